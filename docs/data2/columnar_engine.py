@@ -0,0 +1,112 @@
+"""
+Columnar engine for relate_nlc_export.py (--engine columnar; needs pandas).
+
+Each CSV is read once into a DataFrame of string columns; no per-row dicts are
+built except for the rows pass 1b/1c score. Names and emails are normalized in
+one vectorized pass per column, and the email, name and last-name lookups of
+pass 1a run as hash joins (Index.get_indexer) against per-key tables of (first
+NLC position, bucket size), with the same results as exact_match() row by row.
+Outputs are written from the columns with csv.writer, without per-row dicts.
+"""
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+NLC_FIRST = "Registrant - Person's Name - First Name"
+NLC_LAST = "Registrant - Person's Name - Last Name"
+NLC_EMAIL = "Registrant - Email"
+EXPORT_FIRST = "First Name"
+EXPORT_LAST = "Last Name"
+
+
+def load_table(path: str) -> tuple[list[str], pd.DataFrame]:
+    """(headers, table) for a CSV, read like csv.DictReader: every column as strings, "" for empty
+    fields and the missing end of short rows, values past the header dropped, and a repeated
+    header holding its last column (the table has one column per distinct header)."""
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        headers = next(csv.reader(f), [])
+    df = pd.read_csv(path, header=0, names=list(range(len(headers))), dtype=str, keep_default_na=False,
+                     na_filter=False, index_col=False, encoding="utf-8-sig", encoding_errors="replace")
+    last = {name: i for i, name in enumerate(headers)}
+    df = df[[last[name] for name in dict.fromkeys(headers)]].fillna("")
+    df.columns = list(dict.fromkeys(headers))
+    return headers, df
+
+
+def column(df: pd.DataFrame, name: str) -> pd.Series:
+    """A column, or "" for every row when the CSV does not have it."""
+    return df[name] if name in df else pd.Series("", index=df.index, dtype=object)
+
+
+def rows_at(df: pd.DataFrame, positions: list[int]) -> dict[int, dict]:
+    """Dicts (column -> value) for the rows at positions, built in one call."""
+    return dict(zip(positions, df.iloc[positions].to_dict("records")))
+
+
+def write_table(path: str, headers: list[str], columns: dict[str, list]) -> None:
+    """Write one list of values per header (a repeated header repeats its column) with csv.writer,
+    through <path>.tmp renamed over path, like relate_nlc_export.write_csv()."""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(headers)
+            w.writerows(zip(*(columns[h] for h in headers)))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def bucket_table(keys: pd.Series, mask: pd.Series) -> pd.DataFrame:
+    """For each key under `mask`: the first row position that has it and how many rows do."""
+    grouped = pd.DataFrame({"key": keys[mask], "pos": np.flatnonzero(mask.to_numpy())}).groupby("key", sort=False)["pos"]
+    return pd.DataFrame({"head": grouped.min(), "size": grouped.size()})
+
+
+def probe(keys: pd.Series, table: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Hash-join `keys` against a bucket table; returns (head position or -1, bucket size or 0)."""
+    if table.empty:
+        return np.full(len(keys), -1), np.zeros(len(keys), dtype=int)
+    idx = table.index.get_indexer(keys)
+    found = idx >= 0
+    head = np.where(found, table["head"].to_numpy()[idx], -1)
+    size = np.where(found, table["size"].to_numpy()[idx], 0)
+    return head, size
+
+
+def exact_phase_frames(nlc: pd.DataFrame, exp: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pass 1a for every export row: (NLC row position or -1, match_type, match_by) as arrays."""
+    nlc_email = column(nlc, NLC_EMAIL).str.strip().str.lower()
+    nlc_last = column(nlc, NLC_LAST).str.strip().str.lower()
+    nlc_name = nlc_last + "|" + column(nlc, NLC_FIRST).str.strip().str.lower()
+    by_email = bucket_table(nlc_email, nlc_email != "")
+    by_name = bucket_table(nlc_name, pd.Series(True, index=nlc.index))
+    by_last = bucket_table(nlc_last, nlc_last != "")
+    del nlc_email, nlc_last, nlc_name
+
+    first = column(exp, EXPORT_FIRST).str.strip()
+    is_email = first.str.contains("@", regex=False)
+    first = first.str.lower()
+    email = first.where(is_email, "")
+    last = column(exp, EXPORT_LAST).str.strip().str.lower()
+    name = last + "|" + first.where(~is_email, "")
+
+    e_head, e_size = probe(email, by_email)
+    n_head, n_size = probe(name, by_name)
+    l_head, l_size = probe(last, by_last)
+    e_ok = is_email.to_numpy() & (e_head >= 0)
+    n_ok = ~e_ok & (n_head >= 0)
+    l_ok = ~e_ok & ~n_ok & (last != "").to_numpy() & (l_size == 1)
+
+    pos = np.select([e_ok, n_ok, l_ok], [e_head, n_head, l_head], -1)
+    match_type = np.select([e_ok | n_ok, l_ok], ["exact_match", "possible_match"], "")
+    match_by = np.select(
+        [e_ok & (e_size == 1), e_ok, n_ok & (n_size == 1), n_ok, l_ok],
+        ["email", "email (multiple NLC)", "name", "name (multiple NLC)", "last_name_only (only one in NLC)"],
+        "",
+    )
+    return pos, match_type, match_by
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Duplicate report for nlc_main.csv (Markdown + JSON).
+
+Two streaming passes over the CSV group rows three ways:
+- (first name, last name, Transaction ID)
+- (first name, last name)
+- shared id (unique_id() hashes email + name, so one person registered twice
+  under the same email gets the same nlc_ id, e.g. Beth Millares)
+
+The first pass only counts rows per key. The second keeps a short summary (CSV
+row number, id, Transaction ID, email) of just the rows whose key was counted
+more than once, so memory grows with the number of distinct keys and duplicate
+rows, not with the file. Names are compared trimmed and case-insensitive.
+
+  python3 duplicate_report.py                      # nlc_main.csv -> nlc_main_duplicate_report.md/.json
+  python3 duplicate_report.py --input other.csv --md other_report.md --json other_report.json
+"""
+import argparse
+import csv
+import json
+import os
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
+NLC_MAIN_PATH = os.path.join(SCRIPT_DIR, "nlc_main.csv")
+REPORT_MD_PATH = os.path.join(SCRIPT_DIR, "nlc_main_duplicate_report.md")
+REPORT_JSON_PATH = os.path.join(SCRIPT_DIR, "nlc_main_duplicate_report.json")
+
+NLC_FIRST = "Registrant - Person's Name - First Name"
+NLC_LAST = "Registrant - Person's Name - Last Name"
+NLC_EMAIL = "Registrant - Email"
+NLC_TRANSACTION = "Transaction ID"
+
+GROUPINGS = ("first_last_transaction", "first_last", "shared_id")
+
+
+def normalize(s: str) -> str:
+    if not s or not isinstance(s, str):
+        return ""
+    return s.strip().lower()
+
+
+def row_keys(row: dict) -> list[tuple[str, tuple]]:
+    """(grouping, key) for every grouping the row belongs to."""
+    first = normalize(row.get(NLC_FIRST))
+    last = normalize(row.get(NLC_LAST))
+    keys = []
+    if first or last:
+        keys.append(("first_last_transaction", (first, last, (row.get(NLC_TRANSACTION) or "").strip())))
+        keys.append(("first_last", (first, last)))
+    if row.get("id"):
+        keys.append(("shared_id", (row["id"],)))
+    return keys
+
+
+def row_summary(csv_row: int, row: dict) -> dict:
+    first = (row.get(NLC_FIRST) or "").strip()
+    last = (row.get(NLC_LAST) or "").strip()
+    return {
+        "row": csv_row,
+        "id": row.get("id") or "",
+        "transaction_id": (row.get(NLC_TRANSACTION) or "").strip(),
+        "email": (row.get(NLC_EMAIL) or "").strip(),
+        "name": f"{first} {last}".strip(),
+    }
+
+
+def read_rows(path: str):
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        yield from enumerate(csv.DictReader(f), start=2)
+
+
+def scan(path: str) -> tuple[int, dict[str, dict[tuple, list[dict]]]]:
+    """Stream the CSV twice. Returns (data rows, {grouping: {key: row summaries}}) for keys seen more than once.
+
+    The first pass only counts rows per key; the second keeps summaries for the keys counted more than once.
+    """
+    counts: dict[str, dict[tuple, int]] = {g: {} for g in GROUPINGS}
+    total = 0
+    for _, row in read_rows(path):
+        total += 1
+        for grouping, key in row_keys(row):
+            index = counts[grouping]
+            index[key] = index.get(key, 0) + 1
+    repeated = {g: {key for key, n in index.items() if n > 1} for g, index in counts.items()}
+    del counts
+
+    groups: dict[str, dict[tuple, list[dict]]] = {g: {} for g in GROUPINGS}
+    for csv_row, row in read_rows(path):
+        summary = None
+        for grouping, key in row_keys(row):
+            if key in repeated[grouping]:
+                summary = summary or row_summary(csv_row, row)
+                groups[grouping].setdefault(key, []).append(summary)
+    return total, groups
+
+
+def build_report(path: str, total: int, groups: dict[str, dict[tuple, list[dict]]], generated: str) -> dict:
+    def entries(grouping):
+        return [
+            {"key": list(key), "name": rows[0]["name"], "count": len(rows), "rows": rows}
+            for key, rows in groups[grouping].items()
+        ]
+
+    return {
+        "file": os.path.relpath(path, REPO_ROOT),
+        "generated": generated,
+        "total_rows": total,
+        "duplicates": {g: entries(g) for g in GROUPINGS},
+    }
+
+
+def render_table(rows: list[dict]) -> list[str]:
+    lines = ["| CSV Row | id | Transaction ID | Email |", "|---------|-----|----------------|-------|"]
+    lines += [f"| {r['row']} | {r['id']} | {r['transaction_id']} | {r['email']} |" for r in rows]
+    return lines
+
+
+def render_markdown(report: dict) -> str:
+    dup = report["duplicates"]
+    lines = [
+        f"# Duplicate Report: {os.path.basename(report['file'])}",
+        "",
+        f"Generated: {report['generated']}",
+        "",
+        "## Scope",
+        f"- **File:** `{report['file']}`",
+        f"- **Total data rows:** {report['total_rows']}",
+        "",
+        "---",
+        "",
+        "## 1. Duplicates by (First Name, Last Name, Transaction ID)",
+        "",
+    ]
+    if dup["first_last_transaction"]:
+        n_rows = sum(g["count"] for g in dup["first_last_transaction"])
+        lines += [f"**Result: {len(dup['first_last_transaction'])} combination(s) with multiple rows; {n_rows} rows total.**", ""]
+        for g in dup["first_last_transaction"]:
+            lines += [f"### {g['name']} (Transaction ID {g['key'][2] or 'blank'})", f"- **Count:** {g['count']} rows", ""]
+            lines += render_table(g["rows"]) + [""]
+    else:
+        lines += ["**Result: No duplicates.**", "",
+                  "Every combination of first name, last name, and Transaction ID is unique.", ""]
+
+    lines += [
+        "---",
+        "",
+        "## 2. Duplicates by (First Name, Last Name) only",
+        "",
+        "Same person (first + last name) appearing in more than one row (e.g. different transactions or duplicate registrations).",
+        "",
+    ]
+    if dup["first_last"]:
+        n_rows = sum(g["count"] for g in dup["first_last"])
+        lines += [f"**Result: {len(dup['first_last'])} name(s) with multiple rows; {n_rows} rows total.**", ""]
+        for g in dup["first_last"]:
+            lines += [f"### {g['name']}", f"- **Count:** {g['count']} rows", ""]
+            lines += render_table(g["rows"]) + [""]
+    else:
+        lines += ["**Result: No duplicates.**", ""]
+
+    lines += [
+        "---",
+        "",
+        "## 3. Rows sharing the same id",
+        "",
+        "`id` is a hash of email + name, so the same person registered twice with the same email shares one id.",
+        "",
+    ]
+    if dup["shared_id"]:
+        n_rows = sum(g["count"] for g in dup["shared_id"])
+        lines += [f"**Result: {len(dup['shared_id'])} id(s) on multiple rows; {n_rows} rows total.**", ""]
+        for g in dup["shared_id"]:
+            lines += [f"### {g['key'][0]} ({g['name']})", f"- **Count:** {g['count']} rows", ""]
+            lines += render_table(g["rows"]) + [""]
+    else:
+        lines += ["**Result: No duplicates.**", ""]
+
+    lines += ["---", "", "*End of report*", ""]
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report duplicate rows in nlc_main.csv (Markdown and JSON).")
+    parser.add_argument("--input", default=NLC_MAIN_PATH, help="CSV to check. Default: nlc_main.csv")
+    parser.add_argument("--md", default=REPORT_MD_PATH, help="Markdown report. Default: nlc_main_duplicate_report.md")
+    parser.add_argument("--json", default=REPORT_JSON_PATH, help="JSON report. Default: nlc_main_duplicate_report.json")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Missing {args.input}. Nothing to check.")
+        return
+    total, groups = scan(args.input)
+    report = build_report(os.path.abspath(args.input), total, groups, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    with open(args.md, "w", encoding="utf-8") as f:
+        f.write(render_markdown(report))
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    counts = ", ".join(f"{g}: {len(groups[g])}" for g in GROUPINGS)
+    print(f"Checked {total} rows; duplicate groups ({counts})")
+    print(f"Wrote {os.path.basename(args.md)} and {os.path.basename(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Last-name-only matching as a per-bucket assignment problem.
+
+Export rows and free NLC rows are grouped by normalized last name. Inside each
+bucket every (export, NLC) pair is scored on first name (against the NLC first
+name and the words of its email address), email domain and signup date, and the
+pairing with the highest total score is chosen. Among equally good pairings the
+one closest to the old first-free-row rule (n-th export row of a name gets its
+n-th free NLC row, in file order) wins. Used by relate_nlc_export.py (pass 1b)
+and match_export_not_in_nlc.py.
+
+Each row's name words, email parts and date are parsed once per bucket, and a
+name comparison stops at difflib's cheap upper bounds when they cannot beat the
+best score so far. Buckets with more than MAX_PAIRS (export, NLC) pairs skip the
+scoring and use the first-free-row rule, since the assignment grows as n^2 * m.
+"""
+import difflib
+import re
+from datetime import datetime
+from typing import Callable, Optional
+
+NLC_FIRST = "Registrant - Person's Name - First Name"
+NLC_EMAIL = "Registrant - Email"
+NLC_CREATED = "Created At"
+EXPORT_FIRST = "First Name"
+EXPORT_SIGNED_UP = "Signed Up Date"
+
+# First-name similarity below this is noise ("MARIA ANGELICA" vs "ARNEL" is 0.62) and scores 0.
+NAME_MIN = 0.75
+# Added to the first-free-row pairing's scores: far below any real score difference,
+# it only decides between pairings that score the same.
+TIE_BREAK = 1e-6
+# Larger buckets (e.g. 300 x 300 rows of one last name) take the first-free-row rule instead.
+MAX_PAIRS = 40_000
+
+DATE_FORMATS = ("%Y-%m-%d %I:%M %p", "%m/%d/%Y %I:%M:%S %p", "%m/%d/%y %H:%M", "%m/%d/%Y %H:%M", "%Y-%m-%d")
+
+
+def normalize(s: str) -> str:
+    if not s or not isinstance(s, str):
+        return ""
+    return s.strip().lower()
+
+
+def parse_date(s: str) -> Optional[datetime]:
+    s = (s or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class Name:
+    """A normalized name and its words, with difflib matchers kept for when it is the second
+    (NLC) side of a comparison: SequenceMatcher indexes its second sequence once."""
+
+    def __init__(self, name: str):
+        self.text = normalize(name)
+        self.words = re.findall(r"[a-z]+", self.text)
+        self._matchers: Optional[list[difflib.SequenceMatcher]] = None
+
+    def matchers(self) -> list[difflib.SequenceMatcher]:
+        if self._matchers is None:
+            self._matchers = [difflib.SequenceMatcher(None, "", y) for y in [self.text] + self.words]
+        return self._matchers
+
+
+def ratio_above(matcher: difflib.SequenceMatcher, a: str, floor: float) -> float:
+    """matcher's ratio for first sequence `a`, or 0 when its upper bounds show it is below floor."""
+    matcher.set_seq1(a)
+    if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+        return 0.0
+    return matcher.ratio()
+
+
+def name_score(a: Name, names: list[Name]) -> float:
+    """Best first_name_score() of `a` against any of `names`, 0 below NAME_MIN."""
+    if not a.text or "@" in a.text:
+        return 0.0
+    best = 0.0
+    for b in names:
+        if not b.text:
+            continue
+        # Ratios that cannot reach max(best, NAME_MIN) change neither the max nor the cut-off.
+        whole, *words = b.matchers()
+        best = max(best, ratio_above(whole, a.text, max(best, NAME_MIN)))
+        for x in a.words:
+            for y, matcher in zip(b.words, words):
+                if len(x) >= 3 and len(y) >= 3 and (x.startswith(y) or y.startswith(x)):
+                    best = max(best, 0.9)
+                else:
+                    best = max(best, ratio_above(matcher, x, max(best, NAME_MIN)))
+    return best if best >= NAME_MIN else 0.0
+
+
+def first_name_score(a: str, b: str) -> float:
+    """Similarity of two first names, 0 below NAME_MIN; also compares single names
+    ("Mel Tess" vs "Tess", "Pinky" vs "Frances Julia (Pinky)")."""
+    return name_score(Name(a), [Name(b)])
+
+
+class ExportSide:
+    """What pair_score() reads from an export row, parsed once."""
+
+    def __init__(self, row: dict):
+        self.first = Name(row.get(EXPORT_FIRST, ""))
+        self.signed_up = parse_date(row.get(EXPORT_SIGNED_UP, ""))
+
+
+class NlcSide:
+    """What pair_score() reads from an NLC row, parsed once."""
+
+    def __init__(self, row: dict):
+        self.email = normalize(row.get(NLC_EMAIL, ""))
+        # Couples register once: "Bobbee Marivic" vs OCTAVIO RAMON <bobbee.cfc@...>.
+        self.names = [Name(row.get(NLC_FIRST, ""))]
+        if "@" in self.email:
+            self.names.append(Name(self.email.split("@")[0]))
+        self.created = parse_date(row.get(NLC_CREATED, ""))
+
+
+def side_score(export: ExportSide, nlc: NlcSide) -> float:
+    score = name_score(export.first, nlc.names)
+    export_first = export.first.text
+    if "@" in export_first and "@" in nlc.email:
+        if export_first == nlc.email:
+            score += 1.0
+        elif export_first.split("@")[1] == nlc.email.split("@")[1]:
+            score += 0.3
+    if export.signed_up and nlc.created:
+        days = abs((export.signed_up - nlc.created).total_seconds()) / 86400
+        score += 0.2 * max(0.0, 1 - days / 30)
+    return score
+
+
+def pair_score(export_row: dict, nlc_row: dict) -> float:
+    """Score an export row against an NLC row that already shares its last name."""
+    return side_score(ExportSide(export_row), NlcSide(nlc_row))
+
+
+def best_assignment(scores: list[list[float]]) -> list[tuple[int, int]]:
+    """Maximum-total-score pairing of rows to columns (Hungarian algorithm).
+
+    Returns (row, column) pairs; every row is paired when there are at least
+    as many columns, otherwise every column is.
+    """
+    if not scores or not scores[0]:
+        return []
+    transposed = len(scores) > len(scores[0])
+    if transposed:
+        scores = [list(col) for col in zip(*scores)]
+    n, m = len(scores), len(scores[0])
+    top = max(max(r) for r in scores)
+    cost = [[top - v for v in r] for r in scores]
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        min_to = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            delta, j1 = inf, 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = cost[i0 - 1][j - 1] - u[i0] - v[j]
+                    if cur < min_to[j]:
+                        min_to[j], way[j] = cur, j0
+                    if min_to[j] < delta:
+                        delta, j1 = min_to[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_to[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    pairs = [(owner[j] - 1, j - 1) for j in range(1, m + 1) if owner[j]]
+    if transposed:
+        pairs = [(c, r) for r, c in pairs]
+    return sorted(pairs)
+
+
+def assign_by_last_name(
+    export_rows: list[dict],
+    export_last: Callable[[dict], str],
+    free_by_last: dict[str, list[dict]],
+) -> list[tuple[dict, dict, int]]:
+    """Pair export rows with free NLC rows of the same last name.
+
+    `free_by_last` maps normalized last name to the NLC rows still free to
+    match; assigned rows are removed from it, so it stays a live queue across
+    calls. Returns (export row, NLC row, free NLC rows under the name when the
+    row is matched) in export order: as with taking the first free row for each
+    export row in turn, every earlier match under the name leaves one fewer.
+    """
+    buckets: dict[str, list[dict]] = {}
+    # Buckets keep export order and free NLC rows keep file order, so pairing by position
+    # is what taking the first free row for each export row used to give.
+    for row in export_rows:
+        last_n = normalize(export_last(row))
+        if last_n and free_by_last.get(last_n):
+            buckets.setdefault(last_n, []).append(row)
+
+    assigned: list[tuple[dict, dict, int]] = []
+    for last_n, rows in buckets.items():
+        free = free_by_last[last_n]
+        free_count = len(free)
+        if len(rows) * len(free) > MAX_PAIRS:
+            pairs = list(zip(range(len(rows)), range(len(free))))
+        else:
+            nlc_sides = [NlcSide(nlc_row) for nlc_row in free]
+            scores = []
+            for r, row in enumerate(rows):
+                export = ExportSide(row)
+                scores.append([side_score(export, nlc) + (TIE_BREAK if r == c else 0.0)
+                               for c, nlc in enumerate(nlc_sides)])
+            pairs = best_assignment(scores)
+        taken = set()
+        for k, (r, c) in enumerate(sorted(pairs)):
+            assigned.append((rows[r], free[c], free_count - k))
+            taken.add(c)
+        free_by_last[last_n] = [nlc_row for c, nlc_row in enumerate(free) if c not in taken]
+
+    order = {id(row): i for i, row in enumerate(export_rows)}
+    assigned.sort(key=lambda a: order[id(a[0])])
+    return assigned
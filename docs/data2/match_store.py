@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed match store for data2 (NLC rows, export lists, match relation).
+
+Instead of rewriting nlc_main.csv and export_matched_to_nlc.csv on every pass,
+passes record their matches in one SQLite transaction; the CSV files are
+produced on demand by the export command.
+
+  python3 match_store.py import                      # after relate_nlc_export.py
+  python3 match_store.py match --input export_not_in_nlc.csv --output export_still_not_in_nlc_v2.csv
+  python3 match_store.py match --input export_not_in_nlc.csv --until-fixpoint
+  python3 match_store.py export                      # nlc_main.csv, export_matched_to_nlc.csv, still-not lists
+
+import reloads nlc_main.csv and export_matched_to_nlc.csv (e.g. after relate_nlc_export.py
+rewrote them) and re-applies matches made by earlier passes to NLC rows that are still
+free, so there is no separate sync step. --input files are read only.
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from match_export_not_in_nlc import (
+    EXPORT_MATCHED_PATH,
+    LAST_NAME_KEYS,
+    NLC_LAST,
+    NLC_MAIN_PATH,
+    SCRIPT_DIR,
+    get_last_name,
+    index_unmatched,
+    normalize,
+    read_csv,
+    run_pass,
+    write_csv,
+)
+
+STORE_PATH = os.path.join(SCRIPT_DIR, "match_store.sqlite")
+MATCHED_EXTRA = ("export_id", "nlc_id", "match_type", "match_by")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nlc (
+    pos        INTEGER PRIMARY KEY,
+    id         TEXT NOT NULL,
+    last_norm  TEXT NOT NULL,
+    match_type TEXT NOT NULL,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_nlc_id ON nlc (id);
+CREATE INDEX IF NOT EXISTS idx_nlc_free_last ON nlc (match_type, last_norm);
+CREATE TABLE IF NOT EXISTS export_rows (
+    list      TEXT NOT NULL,
+    pos       INTEGER NOT NULL,
+    last_norm TEXT NOT NULL,
+    data      TEXT NOT NULL,
+    PRIMARY KEY (list, pos)
+);
+CREATE INDEX IF NOT EXISTS idx_export_rows_last ON export_rows (last_norm);
+CREATE TABLE IF NOT EXISTS matches (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    nlc_id      TEXT NOT NULL,
+    match_type  TEXT NOT NULL,
+    match_by    TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_matches_nlc_id ON matches (nlc_id);
+"""
+
+# nlc_main export_* column -> export row column, as written by run_pass().
+EXPORT_COLUMNS = {
+    "export_Flocknote_ID": "Flocknote ID",
+    "export_First_Name": "First Name",
+    "export_Last_Name": "Last Name",
+    "export_Confirmation_Number": "Confirmation Number",
+    "export_Gender_Identity_Dialogue": "Gender Identity, Homosexuality, and Same Sex Attraction Dialogue",
+    "export_Contraception_Dialogue": "Contraception/IVF/Abortion Dialogue",
+    "export_Immigration_Dialogue": "Immigration Dialogue",
+    "export_Signed_Up_Date": "Signed Up Date",
+}
+
+
+def open_store(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def get_meta(conn: sqlite3.Connection, key: str, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value) -> None:
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        (key, json.dumps(value)),
+    )
+
+
+def nlc_record(pos: int, row: dict) -> tuple:
+    return (pos, row.get("id", ""), normalize(row.get(NLC_LAST) or ""), (row.get("match_type") or "").strip(),
+            json.dumps(row))
+
+
+def apply_match(nlc_row: dict, match: dict) -> None:
+    """Fill an NLC row's match columns from a recorded match (same columns run_pass() sets)."""
+    nlc_row["match_type"] = match.get("match_type", "")
+    nlc_row["match_by_comment"] = match.get("match_by", "")
+    for col, export_col in EXPORT_COLUMNS.items():
+        nlc_row[col] = match.get(export_col, "")
+
+
+def import_csvs(conn: sqlite3.Connection, nlc_path: str, matched_path: str) -> tuple[int, int, int, int]:
+    """Load nlc_main and the matched CSV, keeping earlier pass matches.
+
+    Returns (NLC rows, imported match rows, pass matches re-applied, pass matches dropped).
+    """
+    nlc_headers, nlc_rows = read_csv(nlc_path)
+    matched_headers, matched_rows = read_csv(matched_path) if os.path.exists(matched_path) else ([], [])
+    now = datetime.now(timezone.utc).isoformat()
+    reapplied = dropped = 0
+    with conn:
+        set_meta(conn, "nlc_headers", list(nlc_headers))
+        if matched_headers:
+            set_meta(conn, "matched_headers", list(matched_headers))
+        conn.execute("DELETE FROM nlc")
+        conn.executemany("INSERT INTO nlc (pos, id, last_norm, match_type, data) VALUES (?, ?, ?, ?, ?)",
+                         (nlc_record(pos, row) for pos, row in enumerate(nlc_rows)))
+
+        # Rows this store exported earlier come back in the matched CSV; don't import them twice.
+        pass_rows = conn.execute("SELECT seq, nlc_id, data FROM matches WHERE source = 'pass' ORDER BY seq").fetchall()
+        pass_data = {data for _, _, data in pass_rows}
+        conn.execute("DELETE FROM matches WHERE source = 'relate'")
+        imported = [r for r in matched_rows if json.dumps(r) not in pass_data]
+        conn.executemany(
+            "INSERT INTO matches (nlc_id, match_type, match_by, source, recorded_at, data) VALUES (?, ?, ?, 'relate', ?, ?)",
+            ((r.get("nlc_id", ""), r.get("match_type", ""), r.get("match_by", ""), now, json.dumps(r))
+             for r in imported),
+        )
+
+        for seq, nlc_id, data in pass_rows:
+            match = json.loads(data)
+            found = conn.execute("SELECT pos, match_type, data FROM nlc WHERE id = ? ORDER BY pos LIMIT 1",
+                                 (nlc_id,)).fetchone()
+            if found and not found[1]:
+                nlc_row = json.loads(found[2])
+                apply_match(nlc_row, match)
+                conn.execute("UPDATE nlc SET match_type = ?, data = ? WHERE pos = ?",
+                             (nlc_row["match_type"], json.dumps(nlc_row), found[0]))
+                reapplied += 1
+            elif not found or (json.loads(found[2]).get("export_Confirmation_Number", "")
+                               != match.get("Confirmation Number", "")):
+                # The NLC row is gone or now matched to someone else: the pass match no longer holds.
+                conn.execute("DELETE FROM matches WHERE seq = ?", (seq,))
+                dropped += 1
+    return len(nlc_rows), len(imported), reapplied, dropped
+
+
+def free_by_last(conn: sqlite3.Connection) -> tuple[dict[str, list[dict]], dict[int, int]]:
+    """NLC rows with no match yet, by normalized last name, plus id(row) -> pos."""
+    unmatched_by_last: dict[str, list[dict]] = {}
+    positions: dict[int, int] = {}
+    for pos, last_norm, data in conn.execute(
+        "SELECT pos, last_norm, data FROM nlc WHERE match_type = '' AND last_norm != '' ORDER BY pos"
+    ):
+        row = json.loads(data)
+        positions[id(row)] = pos
+        unmatched_by_last.setdefault(last_norm, []).append(row)
+    return unmatched_by_last, positions
+
+
+def record_pass(conn: sqlite3.Connection, newly_matched: list[dict], free_rows: list[dict],
+                positions: dict[int, int]) -> None:
+    """Upsert NLC rows that passes matched and append match rows; the caller owns the transaction."""
+    now = datetime.now(timezone.utc).isoformat()
+    conn.executemany("UPDATE nlc SET match_type = ?, data = ? WHERE pos = ?",
+                     ((r["match_type"], json.dumps(r), positions[id(r)]) for r in free_rows if r.get("match_type")))
+    matched_headers = get_meta(conn, "matched_headers")
+    for row in newly_matched:
+        # Same shape as a row read back from export_matched_to_nlc.csv, so a re-import can recognise it.
+        data = {h: row.get(h, "") for h in matched_headers}
+        conn.execute(
+            "INSERT INTO matches (nlc_id, match_type, match_by, source, recorded_at, data) VALUES (?, ?, ?, 'pass', ?, ?)",
+            (row["nlc_id"], row["match_type"], row["match_by"], now, json.dumps(data)),
+        )
+
+
+def save_list(conn: sqlite3.Connection, name: str, headers: list[str], rows: list[dict]) -> None:
+    lists = get_meta(conn, "lists", {})
+    lists[name] = list(headers)
+    set_meta(conn, "lists", lists)
+    conn.execute("DELETE FROM export_rows WHERE list = ?", (name,))
+    conn.executemany(
+        "INSERT INTO export_rows (list, pos, last_norm, data) VALUES (?, ?, ?, ?)",
+        ((name, pos, normalize(get_last_name(row)), json.dumps(row)) for pos, row in enumerate(rows)),
+    )
+
+
+def match(conn: sqlite3.Connection, input_path: str, output_name: str, until_fixpoint: bool) -> tuple[int, int]:
+    """Run last-name passes for an input list; everything is committed in one transaction.
+
+    Returns (newly matched, still not matched).
+    """
+    exp_headers, exp_rows = read_csv(input_path)
+    unmatched_by_last, positions = free_by_last(conn)
+    free_rows = sorted((row for rows in unmatched_by_last.values() for row in rows), key=lambda r: positions[id(r)])
+
+    newly_matched, still_not = run_pass(exp_rows, unmatched_by_last)
+    pass_no, pass_matched = 1, newly_matched
+    label = LAST_NAME_KEYS[0][0]
+    looser = iter(LAST_NAME_KEYS[1:])
+    while until_fixpoint:
+        # Same last-name key again can't add a match, so later passes use looser keys (see match_export_not_in_nlc).
+        print(f"Pass {pass_no} ({label}): {len(pass_matched)} new match(es), {len(still_not)} row(s) left")
+        step = next(looser, None) if still_not else None
+        if step is None:
+            break
+        label, key = step
+        pass_no += 1
+        pass_matched, still_not = run_pass(still_not, index_unmatched(free_rows, key), key, label)
+        newly_matched.extend(pass_matched)
+
+    with conn:
+        if newly_matched and get_meta(conn, "matched_headers") is None:
+            set_meta(conn, "matched_headers",
+                     ["nlc_id", "match_type", "match_by"] + [h for h in exp_headers if h not in MATCHED_EXTRA])
+        record_pass(conn, newly_matched, free_rows, positions)
+        save_list(conn, output_name, exp_headers, still_not)
+    return len(newly_matched), len(still_not)
+
+
+def export(conn: sqlite3.Connection, out_dir: str) -> None:
+    nlc_headers = get_meta(conn, "nlc_headers")
+    if nlc_headers is None:
+        print("Store is empty; run the import command first.")
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    nlc_rows = [json.loads(d) for (d,) in conn.execute("SELECT data FROM nlc ORDER BY pos")]
+    write_csv(os.path.join(out_dir, os.path.basename(NLC_MAIN_PATH)), nlc_headers, nlc_rows)
+    print(f"Wrote {len(nlc_rows)} rows to {os.path.basename(NLC_MAIN_PATH)}")
+
+    matched_headers = get_meta(conn, "matched_headers", [])
+    matched = [json.loads(d) for (d,) in conn.execute("SELECT data FROM matches ORDER BY source = 'pass', seq")]
+    write_csv(os.path.join(out_dir, os.path.basename(EXPORT_MATCHED_PATH)), matched_headers, matched)
+    print(f"Wrote {len(matched)} rows to {os.path.basename(EXPORT_MATCHED_PATH)}")
+
+    for name, headers in get_meta(conn, "lists", {}).items():
+        rows = [json.loads(d) for (d,) in
+                conn.execute("SELECT data FROM export_rows WHERE list = ? ORDER BY pos", (name,))]
+        write_csv(os.path.join(out_dir, name), headers, rows)
+        print(f"Wrote {len(rows)} rows to {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite match store for nlc_main and export lists.")
+    parser.add_argument("--store", default=STORE_PATH, help="SQLite store file. Default: match_store.sqlite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="Load nlc_main.csv and export_matched_to_nlc.csv into the store.")
+    p_import.add_argument("--nlc-main", default=NLC_MAIN_PATH, help="Default: nlc_main.csv")
+    p_import.add_argument("--matched", default=EXPORT_MATCHED_PATH, help="Default: export_matched_to_nlc.csv")
+    p_match = sub.add_parser("match", help="Match a 'not in NLC' list by last name to NLC rows with no match.")
+    p_match.add_argument("--input", default="export_not_in_nlc.csv", help="Input CSV (read only). Default: export_not_in_nlc.csv")
+    p_match.add_argument("--output", default="export_still_not_in_nlc_v2.csv",
+                         help="Name of the still-not-matched list written by export. Default: export_still_not_in_nlc_v2.csv")
+    p_match.add_argument("--until-fixpoint", action="store_true", help="Follow the first pass with one on a looser last name (spaces, punctuation, (notes) ignored).")
+    p_export = sub.add_parser("export", help="Write nlc_main.csv, export_matched_to_nlc.csv and stored lists.")
+    p_export.add_argument("--out-dir", default=SCRIPT_DIR, help="Directory for the CSV files. Default: docs/data2")
+    args = parser.parse_args()
+
+    conn = open_store(args.store)
+    if args.command == "import":
+        nlc_count, imported, reapplied, dropped = import_csvs(conn, args.nlc_main, args.matched)
+        print(f"Imported {nlc_count} NLC rows and {imported} match rows into {os.path.basename(args.store)}")
+        if reapplied or dropped:
+            print(f"Re-applied {reapplied} earlier pass match(es); dropped {dropped} whose NLC row is gone or taken.")
+    elif args.command == "match":
+        if get_meta(conn, "nlc_headers") is None:
+            print("Store is empty; run the import command first.")
+            return
+        input_path = os.path.join(SCRIPT_DIR, args.input)
+        if not os.path.exists(input_path):
+            print(f"Missing {args.input}. Nothing to run.")
+            return
+        matched, still_not = match(conn, input_path, args.output, args.until_fixpoint)
+        print(f"Recorded {matched} new match(es); {still_not} row(s) stored as {args.output}. {args.input} was NOT modified.")
+    else:
+        export(conn, args.out_dir)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
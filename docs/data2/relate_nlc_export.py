@@ -3,22 +3,73 @@
 Relate NLC (main source) and Export CSVs.
 Run only when source data (NLC or Export CSV) changes.
 - Pass 1a: exact match (email, then first+last name).
-- Pass 1b: possible match by last name only to NLC with no match.
+- Pass 1b: possible match by last name only to NLC with no match, solved per last
+  name as a best-score assignment (first name, email domain, signup date).
+- Pass 1c (--fuzzy): typo-tolerant name match, scored only against NLC rows with
+  no match yet that share a blocking key (last-name Soundex, last-name trigram,
+  email local part).
 Output: nlc_main.csv, export_matched_to_nlc.csv, export_still_not_in_nlc.csv.
 Never writes to export_not_in_nlc.csv.
+
+--workers N shards the pass 1a lookups across a process pool; pass 1b/1c stay
+serial and consume the merged results in export order, so output is identical
+(--compare-parallel runs both and checks). Serial is the default because pass 1a
+is cheap: about 3us per export row, against roughly 0.7s of pool start-up (the
+NLC index is shipped to every worker; measured with 100k NLC rows) plus about
+2.7us per row to move queries and results between processes. A pool only comes
+out ahead with 6+ cores and a few million export rows.
+
+--engine columnar reads each CSV once into pandas string columns instead of row
+dicts, runs pass 1a as hash joins and writes the outputs column by column (see
+columnar_engine.py). Same outputs; on 100k NLC / 50k Export rows it takes about
+as long as the default (~4s) with a quarter less peak memory (224MB vs 307MB).
+
+--incremental keeps a match-state cache (.relate_nlc_cache.pickle) of every source
+record's content hash, match and output line position. Only new or edited records
+are parsed; pass 1a reruns for export rows that read a changed NLC email/name/
+last-name bucket, pass 1b for last names whose candidates changed, and every
+other output line is copied from the previous outputs. If neither source nor the
+options changed and the outputs' size and mtime are the ones it recorded, the run
+exits without writing. With --fuzzy, pass 1c still parses every NLC row.
+
+--stream reads the export row by row: pass 1a runs as each row is read and
+matched rows (and unmatched rows with no free NLC row left under their last
+name) are written at once, so only the NLC index and the pass 1b/1c candidates
+are held in memory. Outputs match a normal run except that
+export_still_not_in_nlc.csv lists rows in the order they were ruled out.
+
+Every output is written to <name>.tmp and renamed into place once complete, so
+an interrupted run leaves the previous outputs untouched and can simply be rerun.
+
+--profile prints per-phase timings and writes relate_nlc_export.metrics.json.
 """
+import argparse
+import bisect
 import csv
+import difflib
 import hashlib
+import io
 import os
+import pickle
+import re
+import sys
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
+from lastname_assignment import assign_by_last_name
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools"))
+import phase_metrics  # noqa: E402  (tools/phase_metrics.py, shared with seed_registrants.py)
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 NLC_PATH = os.path.join(SCRIPT_DIR, "NLC 2026 Registration as of 2-16-26.csv")
 EXPORT_PATH = os.path.join(SCRIPT_DIR, "Export-20260217-DIGNITAS INFINITA BREAKOUT SESSIONS.csv")
 NLC_MAIN_PATH = os.path.join(SCRIPT_DIR, "nlc_main.csv")
 EXPORT_MATCHED_PATH = os.path.join(SCRIPT_DIR, "export_matched_to_nlc.csv")
 EXPORT_STILL_NOT_IN_NLC_PATH = os.path.join(SCRIPT_DIR, "export_still_not_in_nlc.csv")
+CACHE_PATH = os.path.join(SCRIPT_DIR, ".relate_nlc_cache.pickle")
+CACHE_VERSION = 4
 
 NLC_FIRST = "Registrant - Person's Name - First Name"
 NLC_LAST = "Registrant - Person's Name - Last Name"
@@ -27,6 +78,13 @@ EXPORT_FIRST = "First Name"
 EXPORT_LAST = "Last Name"
 EXPORT_PREFIX = "export_"
 
+# Fuzzy pass: minimum score to accept, and blocks larger than this (e.g. very
+# common trigrams) are skipped because they no longer narrow anything down.
+FUZZY_THRESHOLD = 0.85
+FUZZY_MAX_BLOCK = 50
+SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"])
+                 for c in letters}
+
 
 def normalize(s: str) -> str:
     if not s or not isinstance(s, str):
@@ -46,6 +104,484 @@ def unique_id(*parts: str) -> str:
     return "nlc_" + h[:12]
 
 
+def soundex(s: str) -> str:
+    letters = re.sub(r"[^a-z]", "", normalize(s))
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    prev = SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        d = SOUNDEX_CODES.get(c, "")
+        if d != "0" and d != prev:
+            code += d
+        if c not in "hw":
+            prev = d
+    return (code + "000")[:4]
+
+
+def trigrams(s: str) -> set[str]:
+    padded = f"  {re.sub(r'[^a-z]', '', normalize(s))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)} if padded.strip() else set()
+
+
+def email_local(email: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", normalize(email).split("@")[0])
+
+
+def blocking_keys(first: str, last: str, email: str) -> set[str]:
+    keys = set()
+    if normalize(last):
+        keys.add("sx:" + soundex(last))
+        keys.update("tg:" + t for t in trigrams(last))
+    if normalize(first) and normalize(last):
+        # Catches a misspelt last name when the first name is right.
+        keys.add("fx:" + soundex(first) + normalize(last)[0])
+    if email_local(email):
+        keys.add("em:" + email_local(email))
+    return keys
+
+
+def similarity(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def build_blocking_index(nlc_rows: list[dict]) -> tuple[dict[str, list[int]], list[tuple[str, str, str]]]:
+    """Index NLC rows by blocking key. Returns (key -> row positions, normalized (first, last, email local))."""
+    blocks: dict[str, list[int]] = {}
+    fields: list[tuple[str, str, str]] = []
+    for i, row in enumerate(nlc_rows):
+        first = (row.get(NLC_FIRST) or "").strip()
+        last = (row.get(NLC_LAST) or "").strip()
+        email = (row.get(NLC_EMAIL) or "").strip()
+        fields.append((normalize(first), normalize(last), email_local(email)))
+        for key in blocking_keys(first, last, email):
+            blocks.setdefault(key, []).append(i)
+    return blocks, fields
+
+
+def fuzzy_match(
+    blocks: dict[str, list[int]],
+    fields: list[tuple[str, str, str]],
+    first: str,
+    last: str,
+    email: str,
+    matched_nlc_ids: set[str],
+    nlc_rows: list[dict],
+) -> tuple[Optional[int], float]:
+    """Best NLC row position and score among rows sharing a blocking key with the export row.
+
+    NLC rows in matched_nlc_ids are not candidates: a typo-level match to a row that
+    already has its match is more likely a duplicate registration than the same person.
+    """
+    candidates: set[int] = set()
+    for key in blocking_keys(first, last, email):
+        block = blocks.get(key, [])
+        if len(block) <= FUZZY_MAX_BLOCK:
+            candidates.update(block)
+    first_n, last_n, local = normalize(first), normalize(last), email_local(email)
+    best: Optional[int] = None
+    best_rank = (0.0, 0)
+    for i in candidates:
+        if nlc_rows[i]["id"] in matched_nlc_ids:
+            continue
+        nlc_first, nlc_last, nlc_local = fields[i]
+        if local and local == nlc_local:
+            score = 0.95
+        else:
+            score = 0.55 * similarity(last_n, nlc_last) + 0.45 * similarity(first_n, nlc_first)
+        # Ties go to file order.
+        rank = (round(score, 4), -i)
+        if rank > best_rank:
+            best, best_rank = i, rank
+    return best, best_rank[0]
+
+
+def export_lookup(row: dict) -> tuple[str, str, str]:
+    """(first, last, email) for an export row; an email typed into First Name is used as the email."""
+    first = (row.get(EXPORT_FIRST) or "").strip()
+    last = (row.get(EXPORT_LAST) or "").strip()
+    email_from_export = first if first and "@" in first else ""
+    if email_from_export:
+        first = ""
+    return first, last, email_from_export
+
+
+def exact_match(first: str, last: str, email_from_export: str, nlc_by_email: dict, nlc_by_name: dict,
+                nlc_by_last_only: dict) -> tuple[Optional[object], str, str]:
+    """Pass 1a for one export row; returns the first candidate from whichever index matched."""
+    if email_from_export:
+        candidates = nlc_by_email.get(normalize(email_from_export), [])
+        if candidates:
+            return candidates[0], "exact_match", "email" if len(candidates) == 1 else "email (multiple NLC)"
+    key = name_key(first, last)
+    if key:
+        candidates = nlc_by_name.get(key, [])
+        if candidates:
+            return candidates[0], "exact_match", "name" if len(candidates) == 1 else "name (multiple NLC)"
+    last_n = normalize(last)
+    if last_n:
+        candidates = nlc_by_last_only.get(last_n, [])
+        if len(candidates) == 1:
+            return candidates[0], "possible_match", "last_name_only (only one in NLC)"
+    return None, "", ""
+
+
+_worker_indexes: tuple = ()
+
+
+def _init_worker(indexes: tuple) -> None:
+    global _worker_indexes
+    _worker_indexes = indexes
+
+
+def _match_shard(queries: list[tuple[str, str, str]]) -> list[tuple[Optional[int], str, str]]:
+    return [exact_match(*query, *_worker_indexes) for query in queries]
+
+
+def exact_phase(
+    queries: list[tuple[str, str, str]],
+    nlc_rows: list[dict],
+    indexes: tuple[dict, dict, dict],
+    workers: int = 1,
+    shard_size: int = 5000,
+) -> list[tuple[Optional[dict], str, str]]:
+    """Pass 1a for many export rows, optionally sharded across a process pool.
+
+    Workers get the indexes as NLC row positions (cheap to pickle) and
+    pool.map returns shards in order, so the merged result is the same list
+    the serial loop produces.
+    """
+    if workers <= 1 or len(queries) <= shard_size:
+        return [exact_match(*query, *indexes) for query in queries]
+    position = {id(row): i for i, row in enumerate(nlc_rows)}
+    pos_indexes = tuple({k: [position[id(r)] for r in rows] for k, rows in index.items()} for index in indexes)
+    shards = [queries[i:i + shard_size] for i in range(0, len(queries), shard_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pos_indexes,)) as pool:
+        results = [r for shard in pool.map(_match_shard, shards) for r in shard]
+    return [(nlc_rows[pos] if pos is not None else None, match_type, match_by) for pos, match_type, match_by in results]
+
+
+def index_keys(email_n: str, name_k: str, last_n: str) -> list[str]:
+    """The NLC index buckets for a normalized email, name key and last name."""
+    keys = ["n:" + name_k]
+    if email_n:
+        keys.append("e:" + email_n)
+    if last_n:
+        keys.append("l:" + last_n)
+    return keys
+
+
+def lookup_keys(first: str, last: str, email_from_export: str) -> list[str]:
+    """The NLC index buckets that pass 1a reads for an export row."""
+    return index_keys(normalize(email_from_export), name_key(first, last), normalize(last))
+
+
+def split_records(data: bytes) -> tuple[bytes, list[bytes]]:
+    """(header, data records) of a CSV file's bytes: one record per line, except that a
+    quoted field with line breaks keeps its lines together. Blank lines are dropped, like csv.DictReader."""
+    records: list[bytes] = []
+    pending: list[bytes] = []
+    for line in data.split(b"\n"):
+        odd = line.count(b'"') % 2
+        if pending:
+            pending.append(line)
+            if odd:
+                records.append(b"\n".join(pending))
+                pending = []
+        elif odd:
+            pending = [line]
+        elif line and line != b"\r":
+            records.append(line)
+    if pending:
+        records.append(b"\n".join(pending))
+    return (records[0], records[1:]) if records else (b"", [])
+
+
+def record_keys(records: list[bytes]) -> list[bytes]:
+    """Content hash per record; repeated identical records get distinct keys."""
+    seen: dict[bytes, int] = {}
+    keys = []
+    for record in records:
+        digest = hashlib.blake2b(record, digest_size=12).digest()
+        n = seen[digest] = seen.get(digest, 0) + 1
+        keys.append(digest if n == 1 else digest + n.to_bytes(4, "little"))
+    return keys
+
+
+class RecordParser:
+    """Parses records from split_records() into csv.DictReader rows on demand and keeps them."""
+
+    def __init__(self, header: bytes, records: list[bytes]):
+        self.header = header
+        self.records = records
+        text = header.decode("utf-8-sig", errors="replace")
+        self.headers: list[str] = csv.DictReader(io.StringIO(text, newline="")).fieldnames or []
+        self._rows: dict[int, dict] = {}
+
+    def rows(self, positions) -> list[dict]:
+        positions = list(positions)
+        todo = [i for i in dict.fromkeys(positions) if i not in self._rows]
+        if todo:
+            text = b"\n".join([self.header] + [self.records[i] for i in todo]).decode("utf-8-sig", errors="replace")
+            rows = list(csv.DictReader(io.StringIO(text, newline="")))
+            if len(rows) != len(todo):
+                sys.exit(f"{len(todo)} CSV record(s) parsed as {len(rows)} row(s), probably an unbalanced quote; "
+                         "fix the CSV or run without --incremental")
+            self._rows.update(zip(todo, rows))
+        return [self._rows[i] for i in positions]
+
+
+class LineRenderer:
+    """csv.DictWriter that returns each rendered line as UTF-8 bytes instead of writing it."""
+
+    def __init__(self, headers: list[str]):
+        self._line = b""
+        self._w = csv.DictWriter(self, fieldnames=headers, extrasaction="ignore")
+
+    def write(self, s: str) -> None:
+        self._line = s.encode("utf-8")
+
+    def header(self) -> bytes:
+        self._w.writeheader()
+        return self._line
+
+    def render(self, row: dict) -> bytes:
+        self._w.writerow(row)
+        return self._line
+
+
+def copy_range(src, dst, start: int, end: int) -> None:
+    src.seek(start)
+    while start < end:
+        chunk = src.read(min(1 << 20, end - start))
+        if not chunk:
+            raise ValueError(f"{src.name} is shorter than the cache recorded")
+        dst.write(chunk)
+        start += len(chunk)
+
+
+def write_lines(path: str, lines: list) -> list[tuple[int, int]]:
+    """Write lines through <path>.tmp and rename it over path; returns each line's (offset, length).
+
+    A line is either encoded bytes or the (offset, length) of a line in the current file at path;
+    consecutive old lines are copied across as one block.
+    """
+    spans = []
+    offset = 0
+    tmp_path = path + ".tmp"
+    old = open(path, "rb") if any(isinstance(line, tuple) for line in lines) else None
+    try:
+        with open(tmp_path, "wb") as f:
+            run = None  # [start, end) of old lines not copied yet
+            for line in lines:
+                if isinstance(line, tuple):
+                    start, length = line
+                    if run and run[1] == start:
+                        run[1] += length
+                        spans.append((offset, length))
+                        offset += length
+                        continue
+                    if run:
+                        copy_range(old, f, *run)
+                    run = [start, start + length]
+                else:
+                    if run:
+                        copy_range(old, f, *run)
+                        run = None
+                    f.write(line)
+                    length = len(line)
+                spans.append((offset, length))
+                offset += length
+            if run:
+                copy_range(old, f, *run)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if old:
+            old.close()
+    os.replace(tmp_path, path)
+    return spans
+
+
+def moved_positions(old_positions: list[Optional[int]]) -> set[int]:
+    """Positions whose old position is out of order: everything outside one longest run of
+    old positions that still increases (None entries are new rows and are skipped)."""
+    tails: list[int] = []
+    tail_at: list[int] = []
+    previous: dict[int, int] = {}
+    for i, j in enumerate(old_positions):
+        if j is None:
+            continue
+        k = bisect.bisect_left(tails, j)
+        if k:
+            previous[i] = tail_at[k - 1]
+        if k == len(tails):
+            tails.append(j)
+            tail_at.append(i)
+        else:
+            tails[k] = j
+            tail_at[k] = i
+    keep = set()
+    i = tail_at[-1] if tail_at else None
+    while i is not None:
+        keep.add(i)
+        i = previous.get(i)
+    return {i for i, j in enumerate(old_positions) if j is not None and i not in keep}
+
+
+def output_stats(paths) -> list[Optional[tuple[int, int]]]:
+    """(size, mtime_ns) per output, None where it is missing."""
+    stats = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            stats.append(None)
+            continue
+        stats.append((st.st_size, st.st_mtime_ns))
+    return stats
+
+
+def load_cache(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        try:
+            cache = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, ValueError):
+            return {}
+    return cache if isinstance(cache, dict) and cache.get("version") == CACHE_VERSION else {}
+
+
+def save_cache(path: str, cache: dict) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def lastname_match_by(free_count: int, bucket_size: int) -> str:
+    """match_by for a pass 1b pairing, from the NLC rows under the last name still free when the row is
+    matched (as the first-free-row rule counted them) and all NLC rows under it."""
+    if free_count == 1 and bucket_size == 1:
+        return "possible match by lastname (only one in NLC)"
+    if free_count == 1:
+        return "possible match by lastname (only one NLC with no match)"
+    return "possible match by lastname (matched to NLC with no match)"
+
+
+def pass_1b(not_found: list[dict], nlc_by_last_only: dict, matched_nlc_ids: set[str],
+            nlc_matched_export: dict[str, tuple[str, dict]]) -> tuple[list[dict], list[dict]]:
+    """Per-last-name assignment against NLC rows with no match yet. Returns (newly matched, still not found)."""
+    free_by_last = {
+        last_n: [c for c in candidates if c["id"] not in matched_nlc_ids]
+        for last_n, candidates in nlc_by_last_only.items()
+    }
+    newly_matched: list[dict] = []
+    assigned_ids: set[int] = set()
+    for row, nlc_row, free_count in assign_by_last_name(
+        not_found, lambda r: (r.get(EXPORT_LAST) or "").strip(), free_by_last
+    ):
+        nid = nlc_row["id"]
+        row["nlc_id"] = nid
+        row["match_type"] = "possible_match"
+        row["match_by"] = lastname_match_by(free_count, len(nlc_by_last_only[normalize(nlc_row.get(NLC_LAST))]))
+        newly_matched.append(row)
+        if nlc_matched_export.get(nid, (None,))[0] != "exact_match":
+            nlc_matched_export[nid] = ("possible_match", row)
+        matched_nlc_ids.add(nid)
+        assigned_ids.add(id(row))
+    return newly_matched, [row for row in not_found if id(row) not in assigned_ids]
+
+
+def pass_1b_at(buckets: dict[str, tuple[list[int], list[int]]], exp_rows_at, nlc_rows_at,
+               nlc_by_last_only: dict[str, list]) -> list[tuple[int, str, str]]:
+    """Pass 1b on row positions: buckets maps last name to (export positions, free NLC positions) and
+    the *_rows_at callables turn positions into rows. Returns (export position, NLC id, match_by)."""
+    position: dict[int, int] = {}
+    candidates: list[dict] = []
+    free_by_last: dict[str, list[dict]] = {}
+    for last_n, (rows, free) in buckets.items():
+        for i, row in zip(rows, exp_rows_at(rows)):
+            position[id(row)] = i
+            candidates.append(row)
+        free_by_last[last_n] = nlc_rows_at(free)
+    pairs = []
+    for row, nlc_row, free_count in assign_by_last_name(
+        candidates, lambda r: (r.get(EXPORT_LAST) or "").strip(), free_by_last
+    ):
+        bucket_size = len(nlc_by_last_only[normalize(nlc_row.get(NLC_LAST))])
+        pairs.append((position[id(row)], nlc_row["id"], lastname_match_by(free_count, bucket_size)))
+    return pairs
+
+
+def pass_1c(not_found: list[dict], blocks: dict, fields: list, nlc_rows: list[dict], matched_nlc_ids: set[str],
+            nlc_matched_export: dict[str, tuple[str, dict]], threshold: float) -> tuple[list[dict], list[dict]]:
+    """Fuzzy name match against free NLC rows sharing a blocking key. Returns (newly matched, still not found)."""
+    newly_matched: list[dict] = []
+    still_not_found: list[dict] = []
+    for row in not_found:
+        first, last, email_from_export = export_lookup(row)
+        pos, score = fuzzy_match(blocks, fields, first, last, email_from_export, matched_nlc_ids, nlc_rows)
+        if pos is None or score < threshold:
+            still_not_found.append(row)
+            continue
+        nid = nlc_rows[pos]["id"]
+        row["nlc_id"] = nid
+        row["match_type"] = "possible_match"
+        row["match_by"] = f"fuzzy name (score {score:.2f})"
+        newly_matched.append(row)
+        if nlc_matched_export.get(nid, (None,))[0] != "exact_match":
+            nlc_matched_export[nid] = ("possible_match", row)
+        matched_nlc_ids.add(nid)
+    return newly_matched, still_not_found
+
+
+# nlc_main.csv columns copied from the matched export row: (nlc_main column, export column).
+NLC_MAIN_EXPORT_COLUMNS = [
+    (EXPORT_PREFIX + "Flocknote_ID", "Flocknote ID"),
+    (EXPORT_PREFIX + "First_Name", EXPORT_FIRST),
+    (EXPORT_PREFIX + "Last_Name", EXPORT_LAST),
+    (EXPORT_PREFIX + "Confirmation_Number", "Confirmation Number"),
+    (EXPORT_PREFIX + "Gender_Identity_Dialogue", "Gender Identity, Homosexuality, and Same Sex Attraction Dialogue"),
+    (EXPORT_PREFIX + "Contraception_Dialogue", "Contraception/IVF/Abortion Dialogue"),
+    (EXPORT_PREFIX + "Immigration_Dialogue", "Immigration Dialogue"),
+    (EXPORT_PREFIX + "Signed_Up_Date", "Signed Up Date"),
+]
+
+
+def match_comment(match_type: str, match_by: str) -> str:
+    """nlc_main.csv match_by_comment for an NLC row matched with match_type by an export row matched by match_by."""
+    if match_type == "exact_match":
+        return "exact_match: email or first+last name"
+    return match_by or "possible match by lastname"
+
+
+def fill_nlc_main(nlc_headers: list[str], nlc_rows: list[dict],
+                  nlc_matched_export: dict[str, tuple[str, dict]]) -> list[str]:
+    """Add the match and export_* columns to every NLC row; returns the nlc_main.csv headers."""
+    match_headers = ["match_type", "match_by_comment"]
+    export_col_headers = [col for col, _ in NLC_MAIN_EXPORT_COLUMNS]
+    nlc_main_headers = [nlc_headers[0]] + match_headers + nlc_headers[1:] + export_col_headers
+
+    for nlc_row in nlc_rows:
+        nid = nlc_row.get("id", "")
+        for col in match_headers + export_col_headers:
+            nlc_row.setdefault(col, "")
+        if nid in nlc_matched_export:
+            match_type, exp_row = nlc_matched_export[nid]
+            nlc_row["match_type"] = match_type
+            nlc_row["match_by_comment"] = match_comment(match_type, exp_row.get("match_by"))
+            for col, export_col in NLC_MAIN_EXPORT_COLUMNS:
+                nlc_row[col] = exp_row.get(export_col, "")
+
+    return nlc_main_headers
+
+
 def read_csv(path: str) -> tuple[list[str], list[dict]]:
     with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
         reader = csv.DictReader(f)
@@ -55,16 +591,546 @@ def read_csv(path: str) -> tuple[list[str], list[dict]]:
 
 
 def write_csv(path: str, headers: list[str], rows: list[dict]) -> None:
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=headers, extrasaction="ignore")
-        w.writeheader()
-        w.writerows(rows)
+    """Write through <path>.tmp and rename it over path, so an interrupted run never leaves a partial CSV."""
+    out = AtomicCSVWriter(path, headers)
+    try:
+        out.writerows(rows)
+    except BaseException:
+        out.discard()
+        raise
+    out.commit()
+
+
+class AtomicCSVWriter:
+    """csv.DictWriter on <path>.tmp; commit() renames it over path, discard() removes it."""
+
+    def __init__(self, path: str, headers: list[str]):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.rows = 0
+        self._f = open(self.tmp_path, "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=headers, extrasaction="ignore")
+        self._w.writeheader()
+
+    def writerow(self, row: dict) -> None:
+        self._w.writerow(row)
+        self.rows += 1
+
+    def writerows(self, rows) -> None:
+        for row in rows:
+            self.writerow(row)
+
+    def commit(self) -> None:
+        self._f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self) -> None:
+        self._f.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def relate_streaming(args, nlc_headers: list[str], nlc_rows: list[dict], nlc_by_email: dict, nlc_by_name: dict,
+                     nlc_by_last_only: dict) -> None:
+    """--stream: pass 1a on each export row as it is read. Matched rows, and unmatched rows that no NLC row
+    is left for in pass 1b, are written out at once; only pass 1b/1c candidates are kept until the end."""
+    nlc_matched_export: dict[str, tuple[str, dict]] = {}
+    matched_nlc_ids: set[str] = set()
+    candidates: list[dict] = []
+    outputs: list[AtomicCSVWriter] = []
+    rows_read = 0
+    try:
+        with open(EXPORT_PATH, newline="", encoding="utf-8-sig", errors="replace") as f:
+            reader = csv.DictReader(f)
+            exp_headers = reader.fieldnames or []
+            matched_out = AtomicCSVWriter(EXPORT_MATCHED_PATH, ["nlc_id", "match_type", "match_by"] + list(exp_headers))
+            outputs.append(matched_out)
+            not_found_out = AtomicCSVWriter(EXPORT_STILL_NOT_IN_NLC_PATH,
+                                            ["export_id", "match_type", "match_by"] + list(exp_headers))
+            outputs.append(not_found_out)
+            for row in reader:
+                rows_read += 1
+                nlc_row, match_type, match_by = exact_match(*export_lookup(row), nlc_by_email, nlc_by_name,
+                                                            nlc_by_last_only)
+                if nlc_row is not None:
+                    nid = nlc_row["id"]
+                    matched_nlc_ids.add(nid)
+                    row["nlc_id"] = nid
+                    row["match_type"] = match_type
+                    row["match_by"] = match_by
+                    matched_out.writerow(row)
+                    existing = nlc_matched_export.get(nid)
+                    if not existing or (existing[0] == "possible_match" and match_type == "exact_match"):
+                        nlc_matched_export[nid] = (match_type, row)
+                    continue
+                row["export_id"] = "export_" + uuid.uuid4().hex[:12]
+                row["match_type"] = ""
+                row["match_by"] = ""
+                # Matched NLC ids only accumulate, so a row whose last name has no free NLC row now never will.
+                last_n = normalize(row.get(EXPORT_LAST))
+                if args.fuzzy or any(c["id"] not in matched_nlc_ids for c in nlc_by_last_only.get(last_n, ())):
+                    candidates.append(row)
+                else:
+                    not_found_out.writerow(row)
+        phase_metrics.checkpoint("pass 1a", rows_read)
+
+        pass_1b_rows = len(candidates)
+        newly_matched, candidates = pass_1b(candidates, nlc_by_last_only, matched_nlc_ids, nlc_matched_export)
+        matched_out.writerows(newly_matched)
+        phase_metrics.checkpoint("pass 1b", pass_1b_rows)
+
+        if args.fuzzy:
+            blocks, fields = build_blocking_index(nlc_rows)
+            phase_metrics.checkpoint("index build", len(nlc_rows))
+            pass_1c_rows = len(candidates)
+            newly_matched, candidates = pass_1c(candidates, blocks, fields, nlc_rows, matched_nlc_ids,
+                                                nlc_matched_export, args.fuzzy_threshold)
+            matched_out.writerows(newly_matched)
+            print(f"Pass 1c: {len(newly_matched)} fuzzy match(es) at score >= {args.fuzzy_threshold}")
+            phase_metrics.checkpoint("pass 1c", pass_1c_rows)
+        not_found_out.writerows(candidates)
+
+        nlc_main_out = AtomicCSVWriter(NLC_MAIN_PATH, fill_nlc_main(nlc_headers, nlc_rows, nlc_matched_export))
+        outputs.append(nlc_main_out)
+        nlc_main_out.writerows(nlc_rows)
+    except BaseException:
+        for out in outputs:
+            out.discard()
+        raise
+    for out in outputs:
+        out.commit()
+    print(f"Stream: {rows_read} export rows read, {pass_1b_rows} held for pass 1b/1c")
+    print(f"Wrote {nlc_main_out.rows} rows to {os.path.basename(NLC_MAIN_PATH)}")
+    print(f"Wrote {matched_out.rows} matched rows to {os.path.basename(EXPORT_MATCHED_PATH)}")
+    print(f"Wrote {not_found_out.rows} still-not-in-NLC rows to {os.path.basename(EXPORT_STILL_NOT_IN_NLC_PATH)}")
+    phase_metrics.checkpoint("csv write", nlc_main_out.rows + matched_out.rows + not_found_out.rows)
+
+
+def relate_columnar(args) -> None:
+    """--engine columnar: each CSV is read once into string columns (pandas) instead of row dicts, pass 1a
+    runs as hash joins, only pass 1b/1c candidates are turned into dicts, and the outputs are assembled
+    and written column by column."""
+    try:
+        import columnar_engine as columnar
+    except ImportError:
+        sys.exit("--engine columnar needs pandas: pip install -r docs/data2/requirements.txt")
+    nlc_headers, nlc = columnar.load_table(NLC_PATH)
+    exp_headers, exp = columnar.load_table(EXPORT_PATH)
+    phase_metrics.checkpoint("parse", len(nlc) + len(exp))
+
+    nlc_first = columnar.column(nlc, NLC_FIRST)
+    nlc_last = columnar.column(nlc, NLC_LAST)
+    nlc_email = columnar.column(nlc, NLC_EMAIL)
+    nlc_ids = [unique_id(email, first, last) for email, first, last in
+               zip(nlc_email.str.strip(), nlc_first.str.strip(), nlc_last.str.strip())]
+    nlc_by_last_only: dict[str, list[int]] = {}
+    for i, last_n in enumerate(nlc_last.str.strip().str.lower()):
+        if last_n:
+            nlc_by_last_only.setdefault(last_n, []).append(i)
+    phase_metrics.checkpoint("index build", len(nlc))
+
+    matched_nlc_ids: set[str] = set()
+    nlc_matched_export: dict[str, tuple[str, int]] = {}
+    results: dict[int, tuple[str, str, str]] = {}
+    not_found: list[int] = []
+    pos, match_types, match_bys = columnar.exact_phase_frames(nlc, exp)
+    for i, (p, match_type, match_by) in enumerate(zip(pos.tolist(), match_types.tolist(), match_bys.tolist())):
+        if p < 0:
+            not_found.append(i)
+            continue
+        nid = nlc_ids[p]
+        results[i] = (nid, match_type, match_by)
+        matched_nlc_ids.add(nid)
+        existing = nlc_matched_export.get(nid)
+        if not existing or (existing[0] == "possible_match" and match_type == "exact_match"):
+            nlc_matched_export[nid] = (match_type, i)
+    matched = list(results)
+    phase_metrics.checkpoint("pass 1a", len(exp))
+
+    exp_last = columnar.column(exp, EXPORT_LAST).str.strip().str.lower().tolist()
+    buckets: dict[str, tuple[list[int], list[int]]] = {}
+    for i in not_found:
+        last_n = exp_last[i]
+        if last_n and last_n not in buckets:
+            free = [p for p in nlc_by_last_only.get(last_n, ()) if nlc_ids[p] not in matched_nlc_ids]
+            if free:
+                buckets[last_n] = ([], free)
+        if last_n in buckets:
+            buckets[last_n][0].append(i)
+    # One dict per candidate row, built in two calls rather than two per bucket.
+    exp_rows = columnar.rows_at(exp, [i for rows, _ in buckets.values() for i in rows])
+    nlc_rows = columnar.rows_at(nlc, [p for _, free in buckets.values() for p in free])
+    for p, row in nlc_rows.items():
+        row["id"] = nlc_ids[p]
+    pairs = pass_1b_at(buckets, lambda ps: [exp_rows[i] for i in ps], lambda ps: [nlc_rows[p] for p in ps],
+                       nlc_by_last_only)
+    for i, nid, match_by in sorted(pairs):
+        results[i] = (nid, "possible_match", match_by)
+        matched.append(i)
+        if nlc_matched_export.get(nid, (None,))[0] != "exact_match":
+            nlc_matched_export[nid] = ("possible_match", i)
+        matched_nlc_ids.add(nid)
+    phase_metrics.checkpoint("pass 1b", sum(len(rows) for rows, _ in buckets.values()))
+    not_found = [i for i in not_found if i not in results]
+
+    if args.fuzzy:
+        nlc_rows = [{NLC_FIRST: first, NLC_LAST: last, NLC_EMAIL: email, "id": nid}
+                    for first, last, email, nid in zip(nlc_first, nlc_last, nlc_email, nlc_ids)]
+        blocks, fields = build_blocking_index(nlc_rows)
+        phase_metrics.checkpoint("index build", len(nlc_rows))
+        rows = list(columnar.rows_at(exp, not_found).values())
+        position = {id(row): i for i, row in zip(not_found, rows)}
+        newly_matched, _ = pass_1c(rows, blocks, fields, nlc_rows, matched_nlc_ids, {}, args.fuzzy_threshold)
+        for row in newly_matched:
+            i = position[id(row)]
+            nid = row["nlc_id"]
+            results[i] = (nid, "possible_match", row["match_by"])
+            matched.append(i)
+            if nlc_matched_export.get(nid, (None,))[0] != "exact_match":
+                nlc_matched_export[nid] = ("possible_match", i)
+        not_found = [i for i in not_found if i not in results]
+        print(f"Pass 1c: {len(newly_matched)} fuzzy match(es) at score >= {args.fuzzy_threshold}")
+        phase_metrics.checkpoint("pass 1c", len(rows))
+
+    if "id" not in nlc_headers:
+        nlc_headers = ["id"] + nlc_headers
+    hits = [nlc_matched_export.get(nid) for nid in nlc_ids]
+
+    def overlay(col: str, values) -> list[str]:
+        # Columns the NLC CSV already has keep their value on unmatched rows (fill_nlc_main's setdefault).
+        base = nlc[col].tolist() if col in nlc.columns else [""] * len(nlc)
+        return [value if hit else old for hit, value, old in zip(hits, values, base)]
+
+    columns = {col: nlc[col].tolist() for col in nlc.columns}
+    columns["id"] = nlc_ids
+    columns["match_type"] = overlay("match_type", (hit[0] if hit else "" for hit in hits))
+    columns["match_by_comment"] = overlay("match_by_comment", (
+        match_comment(hit[0], results[hit[1]][2]) if hit else "" for hit in hits
+    ))
+    for col, export_col in NLC_MAIN_EXPORT_COLUMNS:
+        values = columnar.column(exp, export_col).tolist()
+        columns[col] = overlay(col, (values[hit[1]] if hit else "" for hit in hits))
+    columnar.write_table(NLC_MAIN_PATH, fill_nlc_main(nlc_headers, [], {}), columns)
+    print(f"Wrote {len(nlc)} rows to {os.path.basename(NLC_MAIN_PATH)}")
+    del columns
+
+    sub = exp.iloc[matched]
+    columns = {col: sub[col].tolist() for col in exp.columns}
+    columns["nlc_id"] = [results[i][0] for i in matched]
+    columns["match_type"] = [results[i][1] for i in matched]
+    columns["match_by"] = [results[i][2] for i in matched]
+    columnar.write_table(EXPORT_MATCHED_PATH, ["nlc_id", "match_type", "match_by"] + exp_headers, columns)
+    print(f"Wrote {len(matched)} matched rows to {os.path.basename(EXPORT_MATCHED_PATH)}")
+    sub = exp.iloc[not_found]
+    columns = {col: sub[col].tolist() for col in exp.columns}
+    columns["export_id"] = ["export_" + uuid.uuid4().hex[:12] for _ in not_found]
+    columns["match_type"] = columns["match_by"] = [""] * len(not_found)
+    columnar.write_table(EXPORT_STILL_NOT_IN_NLC_PATH, ["export_id", "match_type", "match_by"] + exp_headers, columns)
+    print(f"Wrote {len(not_found)} still-not-in-NLC rows to {os.path.basename(EXPORT_STILL_NOT_IN_NLC_PATH)}")
+    phase_metrics.checkpoint("csv write", len(nlc) + len(exp))
+
+
+def relate_incremental(args) -> None:
+    """--incremental: diff both sources record by record against the cache of the last run, rerun
+    pass 1a only for export rows that are new or read an NLC index bucket that changed, and pass 1b
+    only for last names whose candidates changed, then copy every output line whose inputs did not
+    change straight from the previous outputs. Only new or rewritten lines are parsed or rendered."""
+    options = {"fuzzy": args.fuzzy, "fuzzy_threshold": args.fuzzy_threshold}
+    output_paths = (NLC_MAIN_PATH, EXPORT_MATCHED_PATH, EXPORT_STILL_NOT_IN_NLC_PATH)
+    with open(NLC_PATH, "rb") as f:
+        nlc_data = f.read()
+    with open(EXPORT_PATH, "rb") as f:
+        exp_data = f.read()
+    sources = {"nlc": hashlib.sha256(nlc_data).hexdigest(), "export": hashlib.sha256(exp_data).hexdigest()}
+    cache = load_cache(args.cache)
+    # Old output lines are only copied from files that are exactly what the last run wrote.
+    splice = [bool(cache) and stat is not None and stat == old
+              for stat, old in zip(output_stats(output_paths), cache.get("outputs", [None] * 3))]
+    if all(splice) and cache["sources"] == sources and cache["options"] == options:
+        print("Sources unchanged and outputs as the last run wrote them; nothing to do.")
+        return
+    phase_metrics.checkpoint("cache check")
+
+    nlc_header, nlc_records = split_records(nlc_data)
+    exp_header, exp_records = split_records(exp_data)
+    del nlc_data, exp_data
+    nlc_keys = record_keys(nlc_records)
+    exp_keys = record_keys(exp_records)
+    nlc_parser = RecordParser(nlc_header, nlc_records)
+    exp_parser = RecordParser(exp_header, exp_records)
+    nlc_headers = nlc_parser.headers if "id" in nlc_parser.headers else ["id"] + nlc_parser.headers
+    exp_headers = exp_parser.headers
+
+    # Match state is reused only under the same options and NLC columns; export_ids survive any change
+    # that keeps the export columns.
+    reuse = bool(cache) and cache["options"] == options and cache["headers"][0] == nlc_header
+    old_nlc = {t[0]: (j, t) for j, t in enumerate(cache["nlc"])} if reuse else {}
+    old_exp = {t[0]: t for t in cache["export"]} if cache and cache["headers"][1] == exp_header else {}
+
+    # NLC rows: (id, email, name key, last name), normalized. New rows are parsed; the index buckets
+    # they join, and those of removed or moved rows, are dirty.
+    nlc_old = [old_nlc.get(k) for k in nlc_keys]
+    nlc_parser.rows(i for i, hit in enumerate(nlc_old) if hit is None)
+    nlc_state: list[tuple[str, str, str, str]] = []
+    dirty: set[str] = set()
+    old_positions = [hit[0] if hit else None for hit in nlc_old]
+    kept_positions = [j for j in old_positions if j is not None]
+    in_order = all(a < b for a, b in zip(kept_positions, kept_positions[1:]))
+    moved = set() if in_order else moved_positions(old_positions)
+    for i, hit in enumerate(nlc_old):
+        if hit:
+            nlc_state.append(hit[1][1:5])
+            if i in moved:
+                # A moved row changes which candidate comes first in its buckets.
+                dirty.update(index_keys(*nlc_state[-1][1:]))
+            continue
+        row = nlc_parser.rows([i])[0]
+        first = (row.get(NLC_FIRST) or "").strip()
+        last = (row.get(NLC_LAST) or "").strip()
+        email = (row.get(NLC_EMAIL) or "").strip()
+        state = (unique_id(email or "", first, last), normalize(email), name_key(first, last), normalize(last))
+        nlc_state.append(state)
+        dirty.update(index_keys(*state[1:]))
+    kept = set(nlc_keys)
+    for key, (_, t) in old_nlc.items():
+        if key not in kept:
+            dirty.update(index_keys(*t[2:5]))
+    changed_nlc = sum(hit is None for hit in nlc_old)
+    phase_metrics.checkpoint("parse", changed_nlc)
+
+    def nlc_rows_at(positions) -> list[dict]:
+        positions = list(positions)
+        rows = nlc_parser.rows(positions)
+        for i, row in zip(positions, rows):
+            row["id"] = nlc_state[i][0]
+        return rows
+
+    nlc_by_email: dict[str, list[int]] = {}
+    nlc_by_name: dict[str, list[int]] = {}
+    nlc_by_last_only: dict[str, list[int]] = {}
+    for i, (_, email_n, name_k, last_n) in enumerate(nlc_state):
+        if email_n:
+            nlc_by_email.setdefault(email_n, []).append(i)
+        nlc_by_name.setdefault(name_k, []).append(i)
+        if last_n:
+            nlc_by_last_only.setdefault(last_n, []).append(i)
+    phase_metrics.checkpoint("index build", len(nlc_state))
+
+    # Export rows: (first, last, email) lookups, normalized, and the pass 1a result.
+    exp_old = [old_exp.get(k) for k in exp_keys]
+    new_exp = [i for i, t in enumerate(exp_old) if t is None]
+    lookups: list[tuple[str, str, str]] = [t[1] if t else None for t in exp_old]
+    for i, row in zip(new_exp, exp_parser.rows(new_exp)):
+        lookups[i] = tuple(normalize(v) for v in export_lookup(row))
+    indexes = (nlc_by_email, nlc_by_name, nlc_by_last_only)
+    pass_1a: list[Optional[tuple[str, str, str]]] = []
+    rematched = 0
+    for t, lookup in zip(exp_old, lookups):
+        if t and reuse and not (dirty and dirty.intersection(lookup_keys(*lookup))):
+            pass_1a.append(t[3])
+            continue
+        pos, match_type, match_by = exact_match(*lookup, *indexes)
+        pass_1a.append((nlc_state[pos][0], match_type, match_by) if pos is not None else None)
+        rematched += 1
+
+    matched_nlc_ids: set[str] = set()
+    nlc_matched_export: dict[str, tuple[str, int]] = {}
+    results: dict[int, tuple[str, str, str, int]] = {}
+    for i, result in enumerate(pass_1a):
+        if result:
+            nid, match_type, _ = result
+            results[i] = (*result, 1)
+            matched_nlc_ids.add(nid)
+            existing = nlc_matched_export.get(nid)
+            if not existing or (existing[0] == "possible_match" and match_type == "exact_match"):
+                nlc_matched_export[nid] = (match_type, i)
+    not_found = [i for i, result in enumerate(pass_1a) if result is None]
+    phase_metrics.checkpoint("pass 1a", rematched)
+
+    # Pass 1b: a last name whose unmatched export rows, free NLC rows and NLC count are all as
+    # they were keeps its old pairing.
+    buckets: dict[str, list[int]] = {}
+    for i in not_found:
+        last_n = lookups[i][1]
+        if last_n and any(nlc_state[p][0] not in matched_nlc_ids for p in nlc_by_last_only.get(last_n, ())):
+            buckets.setdefault(last_n, []).append(i)
+    old_buckets = cache["buckets"] if reuse else {}
+    bucket_state: dict[str, tuple] = {}
+    pairs: list[tuple[int, str, str]] = []
+    solve: dict[str, tuple[list[int], list[int]]] = {}
+    for last_n, rows in buckets.items():
+        free = [p for p in nlc_by_last_only[last_n] if nlc_state[p][0] not in matched_nlc_ids]
+        state = (tuple(exp_keys[i] for i in rows), tuple(nlc_keys[p] for p in free), len(nlc_by_last_only[last_n]))
+        bucket_state[last_n] = state
+        if old_buckets.get(last_n) == state:
+            for i in rows:
+                old = exp_old[i][4]
+                if old and old[3] == 2:
+                    pairs.append((i, old[0], old[2]))
+        else:
+            solve[last_n] = (rows, free)
+    pairs.extend(pass_1b_at(solve, exp_parser.rows, nlc_rows_at, nlc_by_last_only))
+    pairs.sort()
+    for i, nid, match_by in pairs:
+        results[i] = (nid, "possible_match", match_by, 2)
+        if nlc_matched_export.get(nid, (None,))[0] != "exact_match":
+            nlc_matched_export[nid] = ("possible_match", i)
+        matched_nlc_ids.add(nid)
+    not_found = [i for i in not_found if i not in results]
+    phase_metrics.checkpoint("pass 1b", sum(len(rows) for rows, _ in solve.values()))
+
+    fuzzy_matched: list[int] = []
+    if args.fuzzy:
+        nlc_rows = nlc_rows_at(range(len(nlc_records)))
+        blocks, fields = build_blocking_index(nlc_rows)
+        phase_metrics.checkpoint("index build", len(nlc_rows))
+        rows = exp_parser.rows(not_found)
+        position = {id(row): i for i, row in zip(not_found, rows)}
+        newly_matched, _ = pass_1c(rows, blocks, fields, nlc_rows, matched_nlc_ids, {}, args.fuzzy_threshold)
+        for row in newly_matched:
+            i = position[id(row)]
+            nid = row["nlc_id"]
+            results[i] = (nid, "possible_match", row["match_by"], 3)
+            fuzzy_matched.append(i)
+            if nlc_matched_export.get(nid, (None,))[0] != "exact_match":
+                nlc_matched_export[nid] = ("possible_match", i)
+        not_found = [i for i in not_found if i not in results]
+        print(f"Pass 1c: {len(newly_matched)} fuzzy match(es) at score >= {args.fuzzy_threshold}")
+        phase_metrics.checkpoint("pass 1c", len(rows))
+
+    export_ids = [t[2] if t else "" for t in exp_old]
+    for i in not_found:
+        export_ids[i] = export_ids[i] or "export_" + uuid.uuid4().hex[:12]
+    matched = [i for i, result in enumerate(pass_1a) if result] + [i for i, _, _ in pairs] + fuzzy_matched
+
+    # An output line is copied when its inputs are unchanged: an NLC record and the export row and
+    # match it shows; an export row and its result (and export_id).
+    nlc_main_state = []
+    for nid, *_ in nlc_state:
+        hit = nlc_matched_export.get(nid)
+        nlc_main_state.append((hit[0], exp_keys[hit[1]], results[hit[1]][2]) if hit else None)
+    # (offset, length) entries are copied from the previous output, None entries are rendered below.
+    nlc_lines = [hit[1][6] if splice[0] and hit and hit[1][5] == state else None
+                 for hit, state in zip(nlc_old, nlc_main_state)]
+    matched_lines = []
+    for i in matched:
+        t = exp_old[i]
+        matched_lines.append(t[5][1:] if splice[1] and t and t[5][0] == 1 and t[4] == results[i] else None)
+    not_found_lines = []
+    for i in not_found:
+        t = exp_old[i]
+        reused = splice[2] and t and t[5][0] == 2 and t[4] is None and t[2] == export_ids[i]
+        not_found_lines.append(t[5][1:] if reused else None)
+
+    render_nlc = [i for i, line in enumerate(nlc_lines) if line is None]
+    render_exp = ([i for i, line in zip(matched, matched_lines) if line is None]
+                  + [i for i, line in zip(not_found, not_found_lines) if line is None])
+    sources_of = {nlc_matched_export[nlc_state[i][0]][1] for i in render_nlc
+                  if nlc_state[i][0] in nlc_matched_export}
+    needed = render_exp + sorted(sources_of)
+    for i, row in zip(needed, exp_parser.rows(needed)):
+        result = results.get(i)
+        row["nlc_id"] = result[0] if result else ""
+        row["match_type"] = result[1] if result else ""
+        row["match_by"] = result[2] if result else ""
+        row["export_id"] = export_ids[i]
+    rows = nlc_rows_at(render_nlc)
+    nlc_main_headers = fill_nlc_main(nlc_headers, rows, {
+        nid: (match_type, exp_parser.rows([i])[0]) for nid, (match_type, i) in nlc_matched_export.items()
+        if i in sources_of
+    })
+    renderer = LineRenderer(nlc_main_headers)
+    for i, row in zip(render_nlc, rows):
+        nlc_lines[i] = renderer.render(row)
+    renderer = LineRenderer(["nlc_id", "match_type", "match_by"] + exp_headers)
+    for n, i in enumerate(matched):
+        if matched_lines[n] is None:
+            matched_lines[n] = renderer.render(exp_parser.rows([i])[0])
+    matched_header = renderer.header()
+    renderer = LineRenderer(["export_id", "match_type", "match_by"] + exp_headers)
+    for n, i in enumerate(not_found):
+        if not_found_lines[n] is None:
+            not_found_lines[n] = renderer.render(exp_parser.rows([i])[0])
+    not_found_header = renderer.header()
+
+    nlc_spans = write_lines(NLC_MAIN_PATH, [LineRenderer(nlc_main_headers).header()] + nlc_lines)[1:]
+    print(f"Wrote {len(nlc_lines)} rows to {os.path.basename(NLC_MAIN_PATH)}")
+    matched_spans = write_lines(EXPORT_MATCHED_PATH, [matched_header] + matched_lines)[1:]
+    print(f"Wrote {len(matched_lines)} matched rows to {os.path.basename(EXPORT_MATCHED_PATH)}")
+    not_found_spans = write_lines(EXPORT_STILL_NOT_IN_NLC_PATH, [not_found_header] + not_found_lines)[1:]
+    print(f"Wrote {len(not_found_lines)} still-not-in-NLC rows to {os.path.basename(EXPORT_STILL_NOT_IN_NLC_PATH)}")
+    rendered = len(render_nlc) + len(render_exp)
+    phase_metrics.checkpoint("csv write", rendered)
+
+    exp_spans: dict[int, tuple[int, int, int]] = {}
+    for n, positions, spans in ((1, matched, matched_spans), (2, not_found, not_found_spans)):
+        for i, span in zip(positions, spans):
+            exp_spans[i] = (n, *span)
+    save_cache(args.cache, {
+        "version": CACHE_VERSION,
+        "sources": sources,
+        "options": options,
+        "headers": (nlc_header, exp_header),
+        "outputs": output_stats(output_paths),
+        "nlc": [(k, *state, main_state, span)
+                for k, state, main_state, span in zip(nlc_keys, nlc_state, nlc_main_state, nlc_spans)],
+        "export": [(k, lookups[i], export_ids[i], pass_1a[i], results.get(i), exp_spans[i])
+                   for i, k in enumerate(exp_keys)],
+        "buckets": bucket_state,
+    })
+    print(f"Incremental: {changed_nlc} of {len(nlc_records)} NLC and {len(new_exp)} of {len(exp_records)} export "
+          f"row(s) new or edited; pass 1a rerun for {rematched} row(s), pass 1b for {len(solve)} of {len(buckets)} "
+          f"last name(s); {rendered} of {len(nlc_lines) + len(exp_records)} output line(s) rewritten, the rest "
+          f"copied. Cache saved to {os.path.basename(args.cache)}")
+    phase_metrics.checkpoint("cache save")
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Relate NLC registration and Export CSVs.")
+    parser.add_argument("--fuzzy", action="store_true", help="Run pass 1c: typo-tolerant name matching with blocking.")
+    parser.add_argument("--fuzzy-threshold", type=float, default=FUZZY_THRESHOLD,
+                        help=f"Minimum fuzzy score to accept (0-1). Default: {FUZZY_THRESHOLD}")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse the match-state cache: only parse and rematch rows affected by changes, copy "
+                             "unchanged output lines, keep export_ids stable.")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Match-state cache file for --incremental.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for the pass 1a exact-match lookups (0 = one per CPU). Default: 1 (serial). "
+                             "Pass 1a costs ~3us per export row and a pool adds ~0.7s start-up plus ~2.7us per row, "
+                             "so it only pays off with 6+ cores and a few million export rows.")
+    parser.add_argument("--shard-size", type=int, default=5000, help="Export rows per worker task. Default: 5000")
+    parser.add_argument("--compare-parallel", action="store_true",
+                        help="Run pass 1a both serially and in parallel and stop if the results differ.")
+    parser.add_argument("--engine", choices=("rows", "columnar"), default="rows",
+                        help="rows: CSVs as row dicts; columnar: CSVs as pandas columns, less memory (needs pandas). "
+                             "Default: rows")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the export row by row and write matches as they are found; "
+                             "only pass 1b/1c candidates are held in memory.")
+    phase_metrics.add_profile_args(parser)
+    args = parser.parse_args()
+    phase_metrics.enable_from_args(args, "relate_nlc_export")
+    if args.engine == "columnar" and (args.workers != 1 or args.compare_parallel):
+        parser.error("--engine columnar reads the CSVs into pandas columns; it does not use "
+                     "--workers or --compare-parallel")
+    if args.stream and (args.incremental or args.workers != 1 or args.compare_parallel or args.engine != "rows"):
+        parser.error("--stream runs pass 1a serially on rows as they are read; it does not combine with "
+                     "--incremental, --workers, --compare-parallel or --engine columnar")
+    if args.incremental and (args.workers != 1 or args.compare_parallel or args.engine != "rows"):
+        parser.error("--incremental reads and writes the CSVs itself and reruns pass 1a only where needed; it does "
+                     "not combine with --workers, --compare-parallel or --engine columnar")
+
+    if args.incremental:
+        relate_incremental(args)
+        return
+    if args.engine == "columnar":
+        relate_columnar(args)
+        return
+
     nlc_headers, nlc_rows = read_csv(NLC_PATH)
     if "id" not in nlc_headers:
         nlc_headers = ["id"] + list(nlc_headers)
+    phase_metrics.checkpoint("parse", len(nlc_rows))
 
     nlc_by_email: dict[str, list[dict]] = {}
     nlc_by_name: dict[str, list[dict]] = {}
@@ -83,55 +1149,36 @@ def main() -> None:
             nlc_by_name.setdefault(key, []).append(row)
         if normalize(last):
             nlc_by_last_only.setdefault(normalize(last), []).append(row)
+    phase_metrics.checkpoint("index build", len(nlc_rows))
+
+    if args.stream:
+        relate_streaming(args, nlc_headers, nlc_rows, nlc_by_email, nlc_by_name, nlc_by_last_only)
+        return
 
     exp_headers, exp_rows = read_csv(EXPORT_PATH)
+    phase_metrics.checkpoint("parse", len(exp_rows))
     matched_headers = ["nlc_id", "match_type", "match_by"] + list(exp_headers)
     not_found_headers = ["export_id", "match_type", "match_by"] + list(exp_headers)
     nlc_matched_export: dict[str, tuple[str, dict]] = {}
     matched: list[dict] = []
     not_found: list[dict] = []
 
-    def try_match(row: dict, first: str, last: str, email_from_export: str) -> tuple[Optional[dict], str, str]:
-        if email_from_export:
-            candidates = nlc_by_email.get(normalize(email_from_export), [])
-            if candidates:
-                return candidates[0], "exact_match", "email" if len(candidates) == 1 else "email (multiple NLC)"
-        key = name_key(first, last)
-        if key:
-            candidates = nlc_by_name.get(key, [])
-            if candidates:
-                return candidates[0], "exact_match", "name" if len(candidates) == 1 else "name (multiple NLC)"
-        last_n = normalize(last)
-        if last_n:
-            candidates = nlc_by_last_only.get(last_n, [])
-            if len(candidates) == 1:
-                return candidates[0], "possible_match", "last_name_only (only one in NLC)"
-        return None, "", ""
-
-    def try_match_last_name_only(row: dict, matched_nlc_ids: set[str]) -> tuple[Optional[dict], str, str]:
-        last_n = normalize((row.get(EXPORT_LAST) or "").strip())
-        if not last_n:
-            return None, "", ""
-        candidates = nlc_by_last_only.get(last_n, [])
-        unmatched = [c for c in candidates if c["id"] not in matched_nlc_ids]
-        if not unmatched:
-            return None, "", ""
-        chosen = unmatched[0]
-        if len(unmatched) == 1 and len(candidates) == 1:
-            return chosen, "possible_match", "possible match by lastname (only one in NLC)"
-        if len(unmatched) == 1:
-            return chosen, "possible_match", "possible match by lastname (only one NLC with no match)"
-        return chosen, "possible_match", "possible match by lastname (matched to NLC with no match)"
-
     matched_nlc_ids: set[str] = set()
 
-    for row in exp_rows:
-        first = (row.get(EXPORT_FIRST) or "").strip()
-        last = (row.get(EXPORT_LAST) or "").strip()
-        email_from_export = first if first and "@" in first else ""
-        if email_from_export:
-            first = ""
-        nlc_row, match_type, match_by = try_match(row, first, last, email_from_export)
+    # Pass 1a lookups only read the indexes, so they can run in parallel; everything after is serial.
+    queries = [export_lookup(row) for row in exp_rows]
+    indexes = (nlc_by_email, nlc_by_name, nlc_by_last_only)
+    workers = args.workers or os.cpu_count() or 1
+    results = exact_phase(queries, nlc_rows, indexes, workers, args.shard_size)
+    if args.compare_parallel:
+        serial = exact_phase(queries, nlc_rows, indexes, 1)
+        parallel = exact_phase(queries, nlc_rows, indexes, max(workers, 2), min(args.shard_size, max(1, len(queries) // 4)))
+        diffs = sum(1 for a, b in zip(serial, parallel) if a[0] is not b[0] or a[1:] != b[1:])
+        if diffs:
+            raise SystemExit(f"Parallel check failed: {diffs} of {len(queries)} pass 1a result(s) differ from serial.")
+        print(f"Parallel check: serial and parallel pass 1a results identical for {len(queries)} row(s).")
+
+    for row, (nlc_row, match_type, match_by) in zip(exp_rows, results):
         if nlc_row is not None:
             nid = nlc_row["id"]
             matched_nlc_ids.add(nid)
@@ -147,51 +1194,24 @@ def main() -> None:
             row["match_type"] = ""
             row["match_by"] = ""
             not_found.append(row)
+    phase_metrics.checkpoint("pass 1a", len(exp_rows))
 
-    still_not_found: list[dict] = []
-    for row in not_found:
-        nlc_row, match_type, match_by = try_match_last_name_only(row, matched_nlc_ids)
-        if nlc_row is not None:
-            nid = nlc_row["id"]
-            row["nlc_id"] = nid
-            row["match_type"] = match_type
-            row["match_by"] = match_by
-            matched.append(row)
-            if nlc_matched_export.get(nid, (None,))[0] != "exact_match":
-                nlc_matched_export[nid] = (match_type, row)
-            matched_nlc_ids.add(nid)
-        else:
-            still_not_found.append(row)
-    not_found = still_not_found
+    pass_1b_rows = len(not_found)
+    newly_matched, not_found = pass_1b(not_found, nlc_by_last_only, matched_nlc_ids, nlc_matched_export)
+    matched.extend(newly_matched)
+    phase_metrics.checkpoint("pass 1b", pass_1b_rows)
 
-    match_headers = ["match_type", "match_by_comment"]
-    export_col_headers = [
-        EXPORT_PREFIX + "Flocknote_ID", EXPORT_PREFIX + "First_Name", EXPORT_PREFIX + "Last_Name",
-        EXPORT_PREFIX + "Confirmation_Number", EXPORT_PREFIX + "Gender_Identity_Dialogue",
-        EXPORT_PREFIX + "Contraception_Dialogue", EXPORT_PREFIX + "Immigration_Dialogue",
-        EXPORT_PREFIX + "Signed_Up_Date",
-    ]
-    nlc_main_headers = [nlc_headers[0]] + match_headers + nlc_headers[1:] + export_col_headers
+    if args.fuzzy:
+        blocks, fields = build_blocking_index(nlc_rows)
+        phase_metrics.checkpoint("index build", len(nlc_rows))
+        pass_1c_rows = len(not_found)
+        newly_matched, not_found = pass_1c(not_found, blocks, fields, nlc_rows, matched_nlc_ids, nlc_matched_export,
+                                           args.fuzzy_threshold)
+        matched.extend(newly_matched)
+        print(f"Pass 1c: {len(newly_matched)} fuzzy match(es) at score >= {args.fuzzy_threshold}")
+        phase_metrics.checkpoint("pass 1c", pass_1c_rows)
 
-    for nlc_row in nlc_rows:
-        nid = nlc_row.get("id", "")
-        for col in match_headers + export_col_headers:
-            nlc_row.setdefault(col, "")
-        if nid in nlc_matched_export:
-            match_type, exp_row = nlc_matched_export[nid]
-            nlc_row["match_type"] = match_type
-            nlc_row["match_by_comment"] = (
-                "exact_match: email or first+last name" if match_type == "exact_match"
-                else (exp_row.get("match_by") or "possible match by lastname")
-            )
-            nlc_row[EXPORT_PREFIX + "Flocknote_ID"] = exp_row.get("Flocknote ID", "")
-            nlc_row[EXPORT_PREFIX + "First_Name"] = exp_row.get(EXPORT_FIRST, "")
-            nlc_row[EXPORT_PREFIX + "Last_Name"] = exp_row.get(EXPORT_LAST, "")
-            nlc_row[EXPORT_PREFIX + "Confirmation_Number"] = exp_row.get("Confirmation Number", "")
-            nlc_row[EXPORT_PREFIX + "Gender_Identity_Dialogue"] = exp_row.get("Gender Identity, Homosexuality, and Same Sex Attraction Dialogue", "")
-            nlc_row[EXPORT_PREFIX + "Contraception_Dialogue"] = exp_row.get("Contraception/IVF/Abortion Dialogue", "")
-            nlc_row[EXPORT_PREFIX + "Immigration_Dialogue"] = exp_row.get("Immigration Dialogue", "")
-            nlc_row[EXPORT_PREFIX + "Signed_Up_Date"] = exp_row.get("Signed Up Date", "")
+    nlc_main_headers = fill_nlc_main(nlc_headers, nlc_rows, nlc_matched_export)
 
     write_csv(NLC_MAIN_PATH, nlc_main_headers, nlc_rows)
     print(f"Wrote {len(nlc_rows)} rows to {os.path.basename(NLC_MAIN_PATH)}")
@@ -199,6 +1219,7 @@ def main() -> None:
     print(f"Wrote {len(matched)} matched rows to {os.path.basename(EXPORT_MATCHED_PATH)}")
     write_csv(EXPORT_STILL_NOT_IN_NLC_PATH, not_found_headers, not_found)
     print(f"Wrote {len(not_found)} still-not-in-NLC rows to {os.path.basename(EXPORT_STILL_NOT_IN_NLC_PATH)}")
+    phase_metrics.checkpoint("csv write", len(nlc_rows) + len(matched) + len(not_found))
 
 
 if __name__ == "__main__":
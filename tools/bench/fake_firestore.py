@@ -0,0 +1,87 @@
+"""
+In-memory stand-in for the parts of the Firestore client that seed() and
+seed_bulk() use: collection().document().set()/delete() and batch().commit().
+
+Every request sleeps `latency` seconds (plus up to `jitter` more) so the
+benchmark shows how write mode and --max-in-flight behave against a slow
+network without touching a real database.
+"""
+
+import random
+import threading
+import time
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def set(self, data, merge=False):
+        self._db._request()
+        self._db._apply(self.path, data, merge)
+
+    def delete(self):
+        self._db._request()
+        self._db._apply(self.path, None, False)
+
+
+class FakeCollection:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+
+    def document(self, doc_id):
+        return FakeDocument(self._db, f"{self.path}/{doc_id}")
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append((ref.path, data, merge))
+
+    def delete(self, ref):
+        self._ops.append((ref.path, None, False))
+
+    def commit(self):
+        self._db._request()
+        for path, data, merge in self._ops:
+            self._db._apply(path, data, merge)
+        self._db.commits += 1
+
+
+class FakeFirestore:
+    def __init__(self, latency=0.0, jitter=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.docs = {}
+        self.requests = 0
+        self.commits = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def collection(self, path):
+        return FakeCollection(self, path)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _apply(self, path, data, merge):
+        with self._lock:
+            if data is None:
+                self.docs.pop(path, None)
+            elif merge and path in self.docs:
+                self.docs[path] = {**self.docs[path], **data}
+            else:
+                self.docs[path] = dict(data)
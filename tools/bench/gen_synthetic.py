@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic NLC registration and Flocknote export CSVs (no real PII).
+
+Usage:
+  python tools/bench/gen_synthetic.py --rows 10000 --out-dir /tmp/bench-10k
+  python tools/bench/gen_synthetic.py --rows 1000000 --seed 7 --typo-rate 0.05 --out-dir /tmp/bench-1m
+
+Writes nlc.csv (NLC registration columns, readable by relate_nlc_export.py and
+seed_registrants.py) and export.csv (breakout-session export columns). The same
+--seed always gives the same files. Rates:
+  --shared-surname-rate  people drawn from a small pool of common surnames
+  --missing-email-rate   NLC rows with no email
+  --duplicate-rate       NLC people registered twice (new transaction, same email)
+  --typo-rate            export rows whose first or last name has a one-letter typo
+  --email-in-first-rate  export rows with the email typed into First Name
+  --export-ratio         export rows per NLC row; --not-in-nlc-rate of them are new people
+"""
+
+import argparse
+import csv
+import os
+import random
+import string
+from datetime import datetime, timedelta
+
+NLC_HEADERS = [
+    "Registrant - Amount", "Registrant - Person's Name - First Name", "Registrant - Person's Name - Last Name",
+    "Registrant - Email", "Registrant - Phone Number", "Registrant - Allergies & Special Need",
+    "Registrant - SubTotal", "Region", "Region - Other Text", "Ministry Membership", "Service",
+    "Have Kids to register for KidsZone? (Ages 4 - 12 yrs old)", "How Many Kids for Kidswatch?",
+    "Billing Discount Code", "Administrative Fee", "Total Amount", "Billing Name", "Billing Address Line 1",
+    "Billing Zip", "Billing Email Address", "Billing Phone Number", "Paid", "Paid", "Transaction ID",
+    "Transaction Result", "Transaction Message", "Created At", "NOTES",
+]
+EXPORT_HEADERS = [
+    "Flocknote ID", "First Name", "Last Name", "Confirmation Number",
+    "Gender Identity, Homosexuality, and Same Sex Attraction Dialogue", "Contraception/IVF/Abortion Dialogue",
+    "Immigration Dialogue", "Signed Up Date",
+]
+
+SYLLABLES = ["ba", "be", "ca", "da", "de", "el", "fa", "ga", "gi", "ja", "jo", "ka", "la", "le", "li", "lo", "ma",
+             "me", "mi", "na", "ne", "no", "pa", "pe", "ra", "re", "ri", "ro", "sa", "se", "ta", "te", "to", "va",
+             "vi", "ya", "za", "an", "en", "in", "on", "ar", "er", "or", "tes", "mar", "lan", "rin", "dez", "nez"]
+REGIONS = ["SOUTHWEST A", "SOUTHWEST B", "SOUTHEAST", "NORTHEAST", "MIDWEST", "WEST COAST", "CANADA"]
+MINISTRIES = ["CFC", "Handmaids of the Lord", "Servants of the Lord", "Singles for Christ", "Youth for Christ",
+              "Kids for Christ"]
+SERVICES = ["Worship", "Intercessory", "Hospitality", "Registration", "Security", "None"]
+DOMAINS = ["gmail.com", "yahoo.com", "aol.com", "outlook.com", "icloud.com"]
+START = datetime(2026, 1, 5, 8, 0)
+
+
+def make_name(rng, syllables):
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def typo(rng, name):
+    """One-letter substitution, deletion or transposition."""
+    if len(name) < 3:
+        return name
+    i = rng.randrange(1, len(name) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+    if kind == 1:
+        return name[:i] + name[i + 1:]
+    return name[:i - 1] + name[i] + name[i - 1] + name[i + 1:]
+
+
+def people(rng, count, args):
+    """Yield (first, last, email) for `count` synthetic people."""
+    common = [make_name(rng, 3) for _ in range(200)]
+    firsts = [make_name(rng, 2) for _ in range(max(50, count // 50))]
+    # About three people per ordinary surname at any size, so last-name buckets stay small.
+    surnames = [make_name(rng, 3 + i % 2) for i in range(max(50, count // 3))]
+    for n in range(count):
+        first = rng.choice(firsts)
+        last = rng.choice(common if rng.random() < args.shared_surname_rate else surnames)
+        email = "" if rng.random() < args.missing_email_rate else \
+            f"{first.lower()}.{last.lower()}{n % 97}@{rng.choice(DOMAINS)}"
+        yield first, last, email
+
+
+def nlc_row(rng, first, last, email, n):
+    created = START + timedelta(minutes=rng.randrange(60 * 24 * 40))
+    has_kids = rng.random() < 0.3
+    row = {
+        "Registrant - Amount": "150",
+        "Registrant - Person's Name - First Name": first,
+        "Registrant - Person's Name - Last Name": last,
+        "Registrant - Email": email,
+        "Registrant - Phone Number": f"({rng.randrange(200, 999)}) 555-{rng.randrange(10000):04d}",
+        "Registrant - SubTotal": "150",
+        "Region": rng.choice(REGIONS),
+        "Ministry Membership": rng.choice(MINISTRIES),
+        "Service": rng.choice(SERVICES),
+        "Have Kids to register for KidsZone? (Ages 4 - 12 yrs old)": "Yes" if has_kids else "No",
+        "How Many Kids for Kidswatch?": str(rng.randrange(1, 4)) if has_kids else "",
+        "Total Amount": "150",
+        "Billing Name": f"{first} {last}",
+        "Transaction ID": str(100000000 + n),
+        "Transaction Result": "Approved",
+        "Created At": created.strftime("%m/%d/%Y %I:%M:%S %p"),
+    }
+    return [row.get(h, "") for h in NLC_HEADERS]
+
+
+def export_row(rng, first, last, email, n, args):
+    if rng.random() < args.typo_rate:
+        if rng.random() < 0.5:
+            first = typo(rng, first)
+        else:
+            last = typo(rng, last)
+    if email and rng.random() < args.email_in_first_rate:
+        first = email
+    signed_up = START + timedelta(minutes=rng.randrange(60 * 24 * 40))
+    dialogues = ["X" if rng.random() < 0.3 else "" for _ in range(3)]
+    return [f"F-{n:07X}", first, last, f"C{n:06d}", *dialogues,
+            signed_up.strftime("%Y-%m-%d %I:%M %p").lower()]
+
+
+def generate(rows, out_dir, args):
+    """Write nlc.csv and export.csv; returns (nlc path, export path, export rows)."""
+    rng = random.Random(args.seed)
+    os.makedirs(out_dir, exist_ok=True)
+    nlc_path = os.path.join(out_dir, "nlc.csv")
+    export_path = os.path.join(out_dir, "export.csv")
+    registered = []
+    with open(nlc_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(NLC_HEADERS)
+        n = 0
+        for person in people(rng, rows, args):
+            if n >= rows:
+                break
+            w.writerow(nlc_row(rng, *person, n))
+            registered.append(person)
+            n += 1
+            if n < rows and rng.random() < args.duplicate_rate:
+                w.writerow(nlc_row(rng, *person, n))
+                n += 1
+
+    export_count = int(rows * args.export_ratio)
+    outsiders = people(random.Random(args.seed + 1), export_count, args)
+    with open(export_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(EXPORT_HEADERS)
+        for n in range(export_count):
+            person = next(outsiders) if rng.random() < args.not_in_nlc_rate else rng.choice(registered)
+            w.writerow(export_row(rng, *person, n, args))
+    return nlc_path, export_path, export_count
+
+
+def add_generator_args(parser):
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--shared-surname-rate", type=float, default=0.1)
+    parser.add_argument("--missing-email-rate", type=float, default=0.05)
+    parser.add_argument("--duplicate-rate", type=float, default=0.01)
+    parser.add_argument("--typo-rate", type=float, default=0.03)
+    parser.add_argument("--email-in-first-rate", type=float, default=0.02)
+    parser.add_argument("--export-ratio", type=float, default=0.5)
+    parser.add_argument("--not-in-nlc-rate", type=float, default=0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic NLC and export CSVs")
+    parser.add_argument("--rows", type=int, default=10000, help="NLC rows (default: 10000)")
+    parser.add_argument("--out-dir", required=True, help="Directory for nlc.csv and export.csv")
+    add_generator_args(parser)
+    args = parser.parse_args()
+    nlc_path, export_path, export_count = generate(args.rows, args.out_dir, args)
+    print(f"Wrote {args.rows} rows to {nlc_path}")
+    print(f"Wrote {export_count} rows to {export_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark the data tools on synthetic inputs.
+
+Usage:
+  python tools/bench/run_bench.py                                  # 1k and 10k rows
+  python tools/bench/run_bench.py --sizes 1k,10k,100k,1m           # 1m takes a while
+  python tools/bench/run_bench.py --sizes 10k --latency-ms 20 --max-in-flight 8
+  python tools/bench/run_bench.py --stages relate,match --out bench_results.json
+
+For each size, gen_synthetic.py writes nlc.csv/export.csv under --work-dir
+(reused on later runs with the same seed and rates), then each stage runs in
+its own process so its peak RSS is measured on its own:
+  read_csv   docs/data2 read_csv() of both files + seed_registrants.read_csv()
+  relate     relate_nlc_export.py main() on the synthetic files
+  match      match_export_not_in_nlc.py --until-fixpoint on relate's still-not list
+  seed       seed() (one request per row) against fake_firestore.FakeFirestore
+  seed_bulk  seed_bulk() against the same fake, --batch-size/--max-in-flight
+Rows for read_csv, relate and match count every input row read.
+
+Results (seconds, rows/s, peak RSS per stage and size) are printed as a table
+and written to --out as JSON so runs can be compared.
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(BENCH_DIR)
+DATA2_DIR = os.path.join(os.path.dirname(TOOLS_DIR), "docs", "data2")
+
+from gen_synthetic import add_generator_args, generate  # noqa: E402
+
+STAGES = ("read_csv", "relate", "match", "seed", "seed_bulk")
+# Written by the relate/match stages; dropped when the synthetic inputs are regenerated.
+OUTPUTS = ("nlc_main.csv", "export_matched_to_nlc.csv", "export_still_not_in_nlc.csv", "export_still_not_in_nlc_v2.csv")
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def count_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def stage_read_csv(data_dir, args):
+    sys.path[:0] = [DATA2_DIR, TOOLS_DIR]
+    import relate_nlc_export
+    import seed_registrants
+    _, nlc_rows = relate_nlc_export.read_csv(os.path.join(data_dir, "nlc.csv"))
+    _, exp_rows = relate_nlc_export.read_csv(os.path.join(data_dir, "export.csv"))
+    mapped = seed_registrants.read_csv(os.path.join(data_dir, "nlc.csv"))
+    return len(nlc_rows) + len(exp_rows) + len(mapped)
+
+
+def stage_relate(data_dir, args):
+    sys.path.insert(0, DATA2_DIR)
+    import relate_nlc_export as relate
+    relate.NLC_PATH = os.path.join(data_dir, "nlc.csv")
+    relate.EXPORT_PATH = os.path.join(data_dir, "export.csv")
+    relate.NLC_MAIN_PATH = os.path.join(data_dir, "nlc_main.csv")
+    relate.EXPORT_MATCHED_PATH = os.path.join(data_dir, "export_matched_to_nlc.csv")
+    relate.EXPORT_STILL_NOT_IN_NLC_PATH = os.path.join(data_dir, "export_still_not_in_nlc.csv")
+    sys.argv = ["relate_nlc_export.py"] + args.relate_args.split()
+    relate.main()
+    return count_rows(relate.NLC_PATH) + count_rows(relate.EXPORT_PATH)
+
+
+def stage_match(data_dir, args):
+    sys.path.insert(0, DATA2_DIR)
+    import match_export_not_in_nlc as match
+    if not os.path.exists(os.path.join(data_dir, "nlc_main.csv")):
+        stage_relate(data_dir, args)
+    match.SCRIPT_DIR = data_dir
+    match.NLC_MAIN_PATH = os.path.join(data_dir, "nlc_main.csv")
+    match.EXPORT_MATCHED_PATH = os.path.join(data_dir, "export_matched_to_nlc.csv")
+    sys.argv = ["match_export_not_in_nlc.py", "--input", "export_still_not_in_nlc.csv",
+                "--output", "export_still_not_in_nlc_v2.csv", "--until-fixpoint"]
+    rows = count_rows(match.NLC_MAIN_PATH) + count_rows(os.path.join(data_dir, "export_still_not_in_nlc.csv"))
+    match.main()
+    return rows
+
+
+def stage_seed(data_dir, args, bulk=False):
+    sys.path.insert(0, TOOLS_DIR)
+    import seed_registrants
+    from fake_firestore import FakeFirestore
+    db = FakeFirestore(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, seed=args.seed)
+    rows = seed_registrants.iter_rows(os.path.join(data_dir, "nlc.csv"))
+    if bulk:
+        imported, skipped = seed_registrants.seed_bulk(db, rows, args.batch_size, args.max_in_flight)
+    else:
+        imported, skipped = seed_registrants.seed(db, rows)
+    return imported + skipped
+
+
+def run_stage(stage, data_dir, args):
+    """Run one stage in this process (called via --stage) and print its result as JSON."""
+    runners = {
+        "read_csv": stage_read_csv,
+        "relate": stage_relate,
+        "match": stage_match,
+        "seed": stage_seed,
+        "seed_bulk": lambda d, a: stage_seed(d, a, bulk=True),
+    }
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        rows = runners[stage](data_dir, args)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"rows": rows, "seconds": round(seconds, 4), "peak_rss_mb": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data tools on synthetic data")
+    parser.add_argument("--sizes", default="1k,10k", help="NLC row counts, e.g. 1k,10k,100k,1m (default: 1k,10k)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages (default: all: {','.join(STAGES)})")
+    parser.add_argument("--work-dir", default=os.path.join(BENCH_DIR, "data"),
+                        help="Where synthetic files and outputs go (default: tools/bench/data)")
+    parser.add_argument("--out", default=os.path.join(BENCH_DIR, "bench_results.json"),
+                        help="JSON results file (default: tools/bench/bench_results.json)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fake Firestore latency per request (default: 0)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency per request (default: 0)")
+    parser.add_argument("--batch-size", type=int, default=500, help="seed_bulk batch size (default: 500)")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="seed_bulk commits in flight (default: 4)")
+    parser.add_argument("--relate-args", default="", help="Extra relate_nlc_export.py flags, e.g. '--fuzzy'")
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    add_generator_args(parser)
+    args = parser.parse_args()
+
+    if args.stage:
+        run_stage(args.stage, args.data_dir, args)
+        return
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    gen_args = [f"--{k.replace('_', '-')}={getattr(args, k)}" for k in (
+        "seed", "shared_surname_rate", "missing_email_rate", "duplicate_rate", "typo_rate",
+        "email_in_first_rate", "export_ratio", "not_in_nlc_rate")]
+    passthrough = gen_args + [f"--latency-ms={args.latency_ms}", f"--jitter-ms={args.jitter_ms}",
+                              f"--batch-size={args.batch_size}", f"--max-in-flight={args.max_in_flight}",
+                              f"--relate-args={args.relate_args}"]
+
+    results = []
+    print(f"{'rows':>9}  {'stage':<10} {'seconds':>9} {'rows/s':>11} {'peak RSS MB':>12}")
+    for size in [parse_size(s) for s in args.sizes.split(",") if s.strip()]:
+        data_dir = os.path.join(args.work_dir, f"{size}-seed{args.seed}")
+        stamp = os.path.join(data_dir, "generator.json")
+        settings = dict(rows=size, args=gen_args)
+        if not (os.path.exists(stamp) and json.load(open(stamp, encoding="utf-8")) == settings):
+            for name in OUTPUTS:
+                if os.path.exists(os.path.join(data_dir, name)):
+                    os.remove(os.path.join(data_dir, name))
+            start = time.perf_counter()
+            generate(size, data_dir, args)
+            with open(stamp, "w", encoding="utf-8") as f:
+                json.dump(settings, f)
+            print(f"{size:>9}  {'generate':<10} {time.perf_counter() - start:>9.2f}")
+        for stage in stages:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--stage", stage, "--data-dir", data_dir] + passthrough,
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{size:>9}  {stage:<10} FAILED\n{proc.stderr.strip()}")
+                results.append({"size": size, "stage": stage, "error": proc.stderr.strip().splitlines()[-1:]})
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            rate = result["rows"] / result["seconds"] if result["seconds"] else 0.0
+            result.update(size=size, stage=stage, rows_per_sec=round(rate, 1))
+            results.append(result)
+            print(f"{size:>9}  {stage:<10} {result['seconds']:>9.2f} {rate:>11,.0f} {result['peak_rss_mb']:>12}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"settings": vars(args), "results": results}, f, indent=2)
+        f.write("\n")
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
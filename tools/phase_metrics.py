@@ -0,0 +1,210 @@
+"""
+Phase timings and run metrics for the data scripts (--profile).
+
+Shared by tools/seed_registrants.py, docs/data2/relate_nlc_export.py and
+docs/data2/match_export_not_in_nlc.py. Scripts call add_profile_args() on
+their parser and enable_from_args() after parsing; phases are timed with
+
+    with phase_metrics.phase("index build"):
+        ...
+
+or, in long linear functions, with checkpoint("index build") after each
+step; per-request latencies (e.g. each Firestore batch commit) go through
+phase_metrics.latency(). Until profiling is enabled every call is a no-op,
+so the hooks can stay in the code paths permanently.
+
+On exit the metrics (per-phase seconds, rows, rows/s, latency percentiles,
+peak RSS) are printed and written as JSON; --cprofile also dumps cProfile
+stats readable with `python -m pstats`.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_lock = threading.Lock()
+_state = None
+
+
+class _Run:
+    def __init__(self, script, metrics_path, cprofile_path):
+        self.script = script
+        self.metrics_path = metrics_path
+        self.cprofile_path = cprofile_path
+        self.started = time.perf_counter()
+        self.last_checkpoint = self.started
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.phases = {}
+        self.latencies = {}
+        self.profiler = cProfile.Profile() if cprofile_path else None
+
+
+def add_profile_args(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each phase and write run metrics (rows/s, peak RSS, latency percentiles) as JSON")
+    parser.add_argument("--profile-out", default=None,
+                        help="Metrics JSON path for --profile (default: <script>.metrics.json)")
+    parser.add_argument("--cprofile", default=None,
+                        help="With --profile, also write cProfile stats to this file")
+
+
+def enable_from_args(args, script):
+    """Start collecting if --profile was given; `script` names the default metrics file."""
+    if getattr(args, "profile", False):
+        enable(script, args.profile_out or f"{script}.metrics.json", args.cprofile)
+
+
+def enable(script, metrics_path, cprofile_path=None):
+    global _state
+    _state = _Run(script, metrics_path, cprofile_path)
+    if _state.profiler:
+        _state.profiler.enable()
+    # atexit also covers the scripts' early sys.exit() paths.
+    atexit.register(finish)
+
+
+def _add(name, seconds, rows):
+    with _lock:
+        entry = _state.phases.setdefault(name, {"seconds": 0.0, "rows": 0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["rows"] += rows
+        entry["calls"] += 1
+
+
+@contextmanager
+def phase(name, rows=0):
+    """Time a block as phase `name`; repeated phases with the same name add up."""
+    if _state is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(name, time.perf_counter() - start, rows)
+
+
+def checkpoint(name, rows=0):
+    """Record the time since the previous checkpoint (or since profiling started) as phase `name`."""
+    if _state is not None:
+        now = time.perf_counter()
+        _add(name, now - _state.last_checkpoint, rows)
+        _state.last_checkpoint = now
+
+
+def add_rows(name, rows):
+    """Attribute rows to a phase after the fact (e.g. when the count is only known at the end)."""
+    if _state is not None:
+        with _lock:
+            _state.phases.setdefault(name, {"seconds": 0.0, "rows": 0, "calls": 0})["rows"] += rows
+
+
+def timed_iter(name, iterable):
+    """Yield from `iterable`, counting the time spent producing items (not consuming them) as phase `name`."""
+    if _state is None:
+        yield from iterable
+        return
+    it = iter(iterable)
+    seconds, rows = 0.0, 0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                seconds += time.perf_counter() - start
+                break
+            seconds += time.perf_counter() - start
+            rows += 1
+            yield item
+    finally:
+        _add(name, seconds, rows)
+
+
+def latency(name, seconds):
+    """Record one request latency (e.g. a Firestore batch commit) under `name`."""
+    if _state is not None:
+        with _lock:
+            _state.latencies.setdefault(name, []).append(seconds)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of finished child processes (worker pools)."""
+    if resource is None:
+        return None, None
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def summary():
+    phases = {}
+    for name, entry in _state.phases.items():
+        phases[name] = dict(entry, seconds=round(entry["seconds"], 4))
+        if entry["rows"] and entry["seconds"] > 0:
+            phases[name]["rows_per_sec"] = round(entry["rows"] / entry["seconds"], 1)
+    latencies = {}
+    for name, values in _state.latencies.items():
+        values = sorted(values)
+        latencies[name] = {"count": len(values)}
+        for label, pct in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100)):
+            latencies[name][f"{label}_ms"] = round(percentile(values, pct) * 1000, 2)
+    own, children = peak_rss_mb()
+    return {
+        "script": _state.script,
+        "started_at": _state.started_at,
+        "wall_seconds": round(time.perf_counter() - _state.started, 4),
+        "peak_rss_mb": own,
+        "peak_rss_children_mb": children,
+        "phases": phases,
+        "latencies": latencies,
+    }
+
+
+def finish():
+    """Print and write the metrics once; safe to call more than once."""
+    global _state
+    if _state is None:
+        return
+    if _state.profiler:
+        _state.profiler.disable()
+        _state.profiler.dump_stats(_state.cprofile_path)
+    metrics = summary()
+    with open(_state.metrics_path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
+        f.write("\n")
+
+    print(f"\nProfile ({metrics['wall_seconds']:.2f}s wall, peak RSS {metrics['peak_rss_mb']} MB):")
+    for name, entry in metrics["phases"].items():
+        rate = f", {entry['rows_per_sec']:.0f} rows/s" if "rows_per_sec" in entry else ""
+        rows = f", {entry['rows']} rows" if entry["rows"] else ""
+        print(f"  {name}: {entry['seconds']:.3f}s{rows}{rate}")
+    for name, entry in metrics["latencies"].items():
+        print(f"  {name}: {entry['count']} requests, p50 {entry['p50_ms']}ms, "
+              f"p90 {entry['p90_ms']}ms, p99 {entry['p99_ms']}ms, max {entry['max_ms']}ms")
+    print(f"Metrics written to {os.path.abspath(_state.metrics_path)}")
+    if _state.cprofile_path:
+        print(f"cProfile stats written to {os.path.abspath(_state.cprofile_path)}")
+    _state = None
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+RSVP / check-in report (HTML + JSON) from a local registrant snapshot or nlc_main.csv.
+
+Usage:
+  python tools/registrant_report.py --snapshot tools/registrants.sqlite           # nlc-2026
+  python tools/registrant_report.py --snapshot tools/registrants.sqlite --event march-assembly-2026
+  python tools/registrant_report.py --csv docs/data2/nlc_main.csv
+  python tools/registrant_report.py --snapshot tools/registrants.sqlite --every 120  # refresh loop
+  python tools/registrant_report.py --csv docs/data2/nlc_main.csv --full           # ignore saved rollups
+
+Counts registrants (and, from a snapshot, check-ins) by region, ministry,
+service, kids/KidsZone, match type and breakout dialogue. Nothing reads Firestore:
+refresh the snapshot with snapshot_registrants.py and re-run this.
+
+The rollups are kept in a state file (default: <source>.report-state.json, or
+<source>.<event>.report-state.json for a snapshot) so a refresh only reads what
+is new:
+  --snapshot  documents from snapshot pages committed since the last refresh
+              (sync_seq, numbered per page, so a refresh in the middle of a sync
+              still sees the pages committed after it); each document's
+              previous contribution is subtracted before its new one is added.
+              If documents were removed (snapshot --full), it rebuilds.
+  --csv       rows appended after the last refresh. If the part already read
+              changed (relate_nlc_export.py and match_export_not_in_nlc.py
+              rewrite the file), it rebuilds.
+"""
+
+import argparse
+import csv
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from seed_registrants import EVENT_ID, map_header
+
+STATE_VERSION = 2
+
+# Report dimension -> source headers (nlc_main.csv / NLC registration export). Snapshot
+# documents hold the same fields under the keys seed_registrants.py (map_header) or the
+# Dart seeder (lowercase, spaces and dashes as "_") derived from these headers.
+FIELDS = {
+    "region": ["Region"],
+    "ministry": ["Ministry Membership", "Ministry"],
+    "service": ["Service"],
+    "kids": ["Have Kids to register for KidsZone? (Ages 4 - 12 yrs old)"],
+    "kids_count": ["How Many Kids for Kidswatch?"],
+    "match_type": ["match_type"],
+}
+DIALOGUES = {
+    "Gender Identity Dialogue": "export_Gender_Identity_Dialogue",
+    "Contraception/IVF/Abortion Dialogue": "export_Contraception_Dialogue",
+    "Immigration Dialogue": "export_Immigration_Dialogue",
+}
+DIMENSIONS = ("region", "ministry", "service", "kids", "match_type", "dialogue")
+TITLES = {
+    "region": "By Region",
+    "ministry": "By Ministry",
+    "service": "By Service",
+    "kids": "Kids / KidsZone",
+    "match_type": "Breakout Match Type",
+    "dialogue": "Breakout Dialogue",
+}
+BLANK = "(blank)"
+NO_DIALOGUE = "(none)"
+
+
+def dart_key(header):
+    return re.sub(r"[\s\-]+", "_", header.lower())
+
+
+def field_keys(headers):
+    keys = []
+    for h in headers:
+        for key in (map_header(h), dart_key(h), h):
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+
+FIELD_KEYS = {dim: field_keys(headers) for dim, headers in FIELDS.items()}
+DIALOGUE_KEYS = {label: field_keys([header]) for label, header in DIALOGUES.items()}
+
+
+def lookup(flat, keys):
+    for key in keys:
+        value = flat.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return ""
+
+
+def contribution(flat, checked_in=False):
+    """What one registrant adds to the rollups: [dimension values..., dialogues, kids, checked in]."""
+    values = [lookup(flat, FIELD_KEYS[dim]) or BLANK for dim in ("region", "ministry", "service", "kids", "match_type")]
+    dialogues = [label for label, keys in DIALOGUE_KEYS.items() if lookup(flat, keys).upper() == "X"]
+    kids = lookup(flat, FIELD_KEYS["kids_count"])
+    return values + [dialogues, int(kids) if kids.isdigit() else 0, bool(checked_in)]
+
+
+def empty_rollups():
+    return {
+        "totals": {"registrants": 0, "checked_in": 0, "kids": 0},
+        "counts": {dim: {} for dim in DIMENSIONS},
+    }
+
+
+def apply(rollups, contrib, sign=1):
+    """Add (sign=1) or remove (sign=-1) one registrant's contribution."""
+    *values, dialogues, kids, checked_in = contrib
+    totals = rollups["totals"]
+    totals["registrants"] += sign
+    totals["checked_in"] += sign * checked_in
+    totals["kids"] += sign * kids
+    keyed = list(zip(DIMENSIONS, values)) + [("dialogue", d) for d in dialogues or [NO_DIALOGUE]]
+    for dim, value in keyed:
+        counts = rollups["counts"][dim]
+        entry = counts.setdefault(value, [0, 0])
+        entry[0] += sign
+        entry[1] += sign * checked_in
+        if entry == [0, 0]:
+            del counts[value]
+
+
+def load_state(path, source):
+    """Saved rollups for `source`, or None if there are none (or they are for another source)."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION or state.get("source") != source:
+        return None
+    return state
+
+
+def write_atomic(path, text):
+    """Write through <path>.tmp and rename, so a reader (or a browser refresh) never sees half a file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def save_state(path, state):
+    write_atomic(path, json.dumps(state))
+
+
+def refresh_snapshot(state, path, event_id):
+    """Apply snapshot pages committed since the last refresh. Returns (state, documents read, rebuilt)."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, isolation_level=None)
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(registrants)")}
+        if "sync_seq" not in columns:
+            sys.exit(f"{path} predates sync_seq; run snapshot_registrants.py once to upgrade it")
+        # One read transaction, so the count and the documents come from the same committed pages.
+        conn.execute("BEGIN")
+        total = conn.execute("SELECT COUNT(*) FROM registrants WHERE event_id = ?", (event_id,)).fetchone()[0]
+        rebuilt = state is None
+        if state is None:
+            state = dict(empty_rollups(), docs={}, sync_seq=-1)
+        query = "SELECT doc_id, sync_seq, data FROM registrants WHERE event_id = ? AND sync_seq > ?"
+        read = 0
+        docs = state["docs"]
+        for doc_id, sync_seq, data in conn.execute(query, (event_id, state["sync_seq"])):
+            doc = json.loads(data)
+            flat = {**(doc.get("answers") or {}), **(doc.get("profile") or {})}
+            contrib = contribution(flat, (doc.get("eventAttendance") or {}).get("checkedIn"))
+            if doc_id in docs:
+                apply(state, docs[doc_id], -1)
+            apply(state, contrib)
+            docs[doc_id] = contrib
+            state["sync_seq"] = max(state["sync_seq"], sync_seq)
+            read += 1
+    finally:
+        conn.close()
+    if len(docs) != total:
+        # Documents were dropped from the snapshot (snapshot_registrants.py --full).
+        state, read, _ = refresh_snapshot(None, path, event_id)
+        rebuilt = True
+    return state, read, rebuilt
+
+
+def prefix_sha(f, offset):
+    """SHA256 of the first `offset` bytes; hashing is far cheaper than parsing them again."""
+    f.seek(0)
+    h = hashlib.sha256()
+    remaining = offset
+    while remaining:
+        chunk = f.read(min(remaining, 1 << 20))
+        if not chunk:
+            break
+        h.update(chunk)
+        remaining -= len(chunk)
+    return h.hexdigest()
+
+
+def refresh_csv(state, path):
+    """Apply rows appended since the last refresh. Returns (state, rows read, rebuilt)."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if state is not None and (size < state["offset"] or prefix_sha(f, state["offset"]) != state["prefix_sha"]):
+            state = None
+        rebuilt = state is None
+        if state is None:
+            state = dict(empty_rollups(), offset=0, header=None, prefix_sha="")
+        f.seek(state["offset"])
+        data = f.read()
+    # Stop at the last complete line; a row still being written is picked up next time.
+    data = data[:data.rfind(b"\n") + 1]
+    reader = csv.reader(io.StringIO(data.decode("utf-8-sig" if state["offset"] == 0 else "utf-8")))
+    if state["header"] is None:
+        state["header"] = next(reader, None)
+    read = 0
+    if state["header"]:
+        headers = state["header"]
+        for values in reader:
+            if not any(v.strip() for v in values):
+                continue
+            apply(state, contribution(dict(zip(headers, values))))
+            read += 1
+    state["offset"] += len(data)
+    with open(path, "rb") as f:
+        state["prefix_sha"] = prefix_sha(f, state["offset"])
+    return state, read, rebuilt
+
+
+def build_report(state, source, generated):
+    def ordered(counts):
+        items = sorted(counts.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        return [{"value": value, "registrants": reg, "checked_in": chk} for value, (reg, chk) in items]
+
+    return {
+        "source": source,
+        "generated": generated,
+        "totals": dict(state["totals"]),
+        "breakdowns": {dim: ordered(state["counts"][dim]) for dim in DIMENSIONS},
+    }
+
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+  <title>{title}</title>
+  <style>
+    * {{ box-sizing: border-box; margin: 0; padding: 0; }}
+    body {{ font-family: 'Segoe UI', system-ui, -apple-system, sans-serif; background: #0a0e1a; color: #fff;
+           display: flex; flex-direction: column; align-items: center; padding: 40px 16px 80px; }}
+    .page {{ width: 100%; max-width: 760px; }}
+    .header {{ text-align: center; margin-bottom: 36px; }}
+    .header .eyebrow {{ font-size: 12px; font-weight: 700; letter-spacing: 2.5px; text-transform: uppercase;
+                        color: #F4A340; margin-bottom: 12px; }}
+    .header h1 {{ font-size: clamp(26px, 5vw, 38px); font-weight: 900; }}
+    .header .sub {{ margin-top: 10px; font-size: 14px; color: rgba(255,255,255,0.55); }}
+    .stats-grid {{ display: grid; grid-template-columns: repeat(2, 1fr); gap: 14px; margin-bottom: 28px; }}
+    @media (min-width: 520px) {{ .stats-grid {{ grid-template-columns: repeat(4, 1fr); }} }}
+    .stat-card {{ background: rgba(255,255,255,0.04); border: 1px solid rgba(255,255,255,0.08);
+                  border-radius: 18px; padding: 22px 16px; text-align: center; }}
+    .stat-card .value {{ font-size: clamp(28px, 6vw, 38px); font-weight: 900; line-height: 1; }}
+    .stat-card .label {{ margin-top: 6px; font-size: 11px; font-weight: 700; letter-spacing: 1.2px;
+                         text-transform: uppercase; color: rgba(255,255,255,0.45); }}
+    .stat-card.highlight {{ border-color: rgba(244,163,64,0.35); background: rgba(244,163,64,0.08); }}
+    .stat-card.highlight .value {{ color: #F4A340; }}
+    .section-title {{ font-size: 11px; font-weight: 700; letter-spacing: 2px; text-transform: uppercase;
+                      color: rgba(255,255,255,0.35); margin-bottom: 12px; padding-left: 4px; }}
+    .progress-section {{ background: rgba(255,255,255,0.04); border: 1px solid rgba(255,255,255,0.08);
+                         border-radius: 16px; padding: 22px; margin-bottom: 28px; }}
+    .progress-row {{ display: flex; align-items: center; gap: 14px; margin-bottom: 14px; }}
+    .progress-row:last-child {{ margin-bottom: 0; }}
+    .progress-label {{ font-size: 13px; font-weight: 600; color: rgba(255,255,255,0.65); width: 220px;
+                       flex-shrink: 0; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; }}
+    .progress-bar-wrap {{ flex: 1; height: 8px; background: rgba(255,255,255,0.08); border-radius: 999px;
+                          overflow: hidden; }}
+    .progress-bar-fill {{ height: 100%; border-radius: 999px; background: linear-gradient(90deg, #0E3A5D, #F4A340); }}
+    .progress-count {{ font-size: 14px; font-weight: 800; width: 80px; text-align: right; }}
+    .progress-count span {{ font-weight: 600; color: rgba(255,255,255,0.45); }}
+    .footer {{ text-align: center; margin-top: 12px; font-size: 12px; color: rgba(255,255,255,0.35); }}
+  </style>
+</head>
+<body>
+  <div class="page">
+    <div class="header">
+      <div class="eyebrow">{eyebrow}</div>
+      <h1>{title}</h1>
+      <div class="sub">{sub}</div>
+    </div>
+
+    <div class="section-title">Overview</div>
+    <div class="stats-grid">
+{cards}
+    </div>
+{sections}
+    <div class="footer">Report generated · {generated} · {source}</div>
+  </div>
+</body>
+</html>
+"""
+
+
+def render_html(report, title, with_checkins):
+    totals = report["totals"]
+    registrants = totals["registrants"]
+    matched = sum(e["registrants"] for e in report["breakdowns"]["match_type"] if e["value"] != BLANK)
+    cards = [("Registrants", registrants, True)]
+    if with_checkins:
+        cards.append(("Checked In", totals["checked_in"], False))
+    cards += [("Kids", totals["kids"], False), ("Breakout Matches", matched, False)]
+    if not with_checkins:
+        with_dialogue = registrants - sum(e["registrants"] for e in report["breakdowns"]["dialogue"]
+                                          if e["value"] == NO_DIALOGUE)
+        cards.append(("In a Dialogue", with_dialogue, False))
+    card_html = "\n".join(
+        f'      <div class="stat-card{" highlight" if highlight else ""}">'
+        f'<div class="value">{value}</div><div class="label">{label}</div></div>'
+        for label, value, highlight in cards
+    )
+
+    sections = []
+    for dim in DIMENSIONS:
+        entries = report["breakdowns"][dim]
+        if not entries:
+            continue
+        top = max(e["registrants"] for e in entries) or 1
+        rows = []
+        for e in entries:
+            label = html.escape(e["value"])
+            short = html.escape(e["value"].split(" (")[0])
+            checked = f' <span>/ {e["checked_in"]} in</span>' if with_checkins else ""
+            rows.append(
+                f'      <div class="progress-row"><div class="progress-label" title="{label}">{short}</div>'
+                f'<div class="progress-bar-wrap"><div class="progress-bar-fill" '
+                f'style="width:{round(100 * e["registrants"] / top)}%"></div></div>'
+                f'<div class="progress-count">{e["registrants"]}{checked}</div></div>'
+            )
+        sections.append(f'\n    <div class="section-title">{TITLES[dim]}</div>\n'
+                        f'    <div class="progress-section">\n' + "\n".join(rows) + "\n    </div>")
+    return PAGE.format(
+        title=html.escape(title),
+        eyebrow="RSVP &amp; Check-in Report" if with_checkins else "RSVP Report",
+        sub=f"{registrants} registrants" + (f" · {totals['checked_in']} checked in" if with_checkins else ""),
+        cards=card_html,
+        sections="".join(sections),
+        generated=html.escape(report["generated"]),
+        source=html.escape(report["source"]),
+    )
+
+
+def run_once(args, source, state_path, html_path, json_path):
+    start = time.perf_counter()
+    state = None if args.full else load_state(state_path, source)
+    if args.snapshot:
+        state, read, rebuilt = refresh_snapshot(state, args.snapshot, args.event)
+    else:
+        state, read, rebuilt = refresh_csv(state, args.csv)
+    state["version"] = STATE_VERSION
+    state["source"] = source
+    save_state(state_path, state)
+
+    report = build_report(state, source, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    write_atomic(json_path, json.dumps(report, indent=2) + "\n")
+    write_atomic(html_path, render_html(report, args.title or f"{args.event if args.snapshot else 'NLC'} Registrants",
+                                        with_checkins=bool(args.snapshot)))
+    mode = "rebuilt" if rebuilt else "incremental"
+    print(f"{report['generated']}: {read} {'documents' if args.snapshot else 'rows'} read ({mode}), "
+          f"{report['totals']['registrants']} registrants, {report['totals']['checked_in']} checked in "
+          f"in {time.perf_counter() - start:.2f}s -> {html_path}, {json_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSVP / check-in report from a snapshot or nlc_main.csv")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--snapshot", help="SQLite file written by snapshot_registrants.py")
+    source.add_argument("--csv", help="nlc_main.csv (or another NLC registration CSV)")
+    parser.add_argument("--event", default=EVENT_ID, help=f"Event ID in the snapshot (default: {EVENT_ID})")
+    parser.add_argument("--html", default=None, help="HTML report (default: <source>[.<event>].report.html)")
+    parser.add_argument("--json", default=None, help="JSON report (default: <source>[.<event>].report.json)")
+    parser.add_argument("--state", default=None,
+                        help="Rollup state file (default: <source>[.<event>].report-state.json)")
+    parser.add_argument("--title", default=None, help="Report heading")
+    parser.add_argument("--full", action="store_true", help="Ignore saved rollups and rescan the source")
+    parser.add_argument("--every", type=float, default=None,
+                        help="Refresh every N seconds until interrupted")
+    args = parser.parse_args()
+
+    path = args.snapshot or args.csv
+    if not os.path.exists(path):
+        sys.exit(f"Error: File not found: {path}")
+    base = f"{os.path.splitext(path)[0]}.{args.event}" if args.snapshot else os.path.splitext(path)[0]
+    source = f"{os.path.abspath(path)}#{args.event}" if args.snapshot else os.path.abspath(path)
+    state_path = args.state or f"{base}.report-state.json"
+    html_path = args.html or f"{base}.report.html"
+    json_path = args.json or f"{base}.report.json"
+
+    run_once(args, source, state_path, html_path, json_path)
+    args.full = False
+    while args.every:
+        try:
+            time.sleep(args.every)
+        except KeyboardInterrupt:
+            break
+        run_once(args, source, state_path, html_path, json_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,34 @@ Usage:
   pip install -r tools/requirements.txt
   python tools/seed_registrants.py                          # uses tools/nlc_registrants.csv
   python tools/seed_registrants.py tools/sample_nlc_registrants.csv
+  python tools/seed_registrants.py registrants.xlsx         # first sheet, streamed (needs openpyxl)
   python tools/seed_registrants.py --database event-hub-dev  # explicit database
   python tools/seed_registrants.py --database '(default)'    # use default database
+  python tools/seed_registrants.py --bulk --max-in-flight 8  # batched writes, 8 commits at a time
+  python tools/seed_registrants.py --incremental             # only write rows changed since last run
+  python tools/seed_registrants.py --async --rate 400        # async client, 400 writes/s, retries
+  python tools/seed_registrants.py x.dead-letter.csv --async # re-run rows that failed last time
+  python tools/seed_registrants.py --reconcile --dry-run     # diff the file against Firestore
+  python tools/seed_registrants.py --reconcile --prune       # sync writes, delete cancelled registrants
+  python tools/seed_registrants.py --events events.json --bulk  # several events/files in one process
+  python tools/seed_registrants.py --bulk --profile         # phase timings + seed_registrants.metrics.json
+  python tools/seed_registrants.py x.csv --dry-run           # validate only (no Firebase needed)
+  python tools/seed_registrants.py --bulk --hash-pii         # hash names/email/phone/unit first
+
+--dry-run validates every row (email/phone format, required names, numeric
+kidsCount, doc ID collisions, unmapped headers) across a process pool and
+prints a summary; Firebase is only imported when something is written or read.
+
+--hash-pii stores firstName, lastName, name, email, phone and unit as SHA256
+hashes (first 16 hex chars of the trimmed, lowercased value), the same as the
+Dart seeder, so doc IDs are built from hashes too. --hash-salt (or
+SEED_HASH_SALT) switches to HMAC-SHA256 with that salt. Dead-letter files of a
+hashed run already hold hashes; re-run them without --hash-pii.
+
+An --events file lists the jobs to run concurrently; `file` is relative to the
+JSON file and `database` defaults to --database:
+  [{"eventId": "nlc-2026", "file": "nlc.csv", "database": "event-hub-dev"},
+   {"eventId": "march-assembly-2026", "file": "march.xlsx"}]
 
 Requires: Firebase service account key.
   Option 1: GOOGLE_APPLICATION_CREDENTIALS env var pointing to the JSON key file.
@@ -16,16 +42,27 @@ Requires: Firebase service account key.
 """
 
 import argparse
+import asyncio
 import csv
+import hashlib
+import hmac
+import itertools
+import json
 import os
+import random
+import re
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 
-import firebase_admin
-from firebase_admin import credentials, firestore
+import phase_metrics
 
 EVENT_ID = "nlc-2026"
 
+# Firestore caps a single commit at 500 writes.
+MAX_BATCH_SIZE = 500
+
 # Map CSV headers to schema keys
 HEADER_MAP = {
     "registrant - person's name - first name": "firstName",
@@ -54,6 +91,29 @@ HEADER_MAP = {
 
 PROFILE_KEYS = {"firstName", "lastName", "email", "phone", "cfcId", "name", "unit", "role"}
 
+# Schema keys map to themselves, so files written by this tool (dead-letter CSVs) read back as-is.
+SCHEMA_KEYS = {key.lower(): key for key in HEADER_MAP.values()}
+
+# PROFILE_KEYS the Dart seeder (lib/src/tools/seed_nlc_registrants.dart) treats as
+# PII; cfcId and role stay readable there too.
+PII_KEYS = ("firstName", "lastName", "name", "email", "phone", "unit")
+HASH_LENGTH = 16
+# Values hashed per pool task, and the memo size at which it is reset (unique
+# emails and phones never repeat, so an unbounded memo only costs memory).
+HASH_CHUNK = 20000
+HASH_MEMO_MAX = 500000
+
+# --dry-run validation rules.
+REQUIRED_KEYS = ("firstName", "lastName")
+EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+PHONE_RE = re.compile(r"\+?[\d\s().-]+")
+DOC_ID_MAX = 60
+
+# Dead-letter CSV columns that describe the failure; iter_rows() skips "#" columns
+# except #docId, which make_doc_id() reuses so a retry writes the same document.
+DOC_ID_KEY = "#docId"
+DEAD_LETTER_INFO = ["#row", "#error", DOC_ID_KEY]
+
 
 def normalize_header(h):
     return h.strip().lower()
@@ -61,132 +121,913 @@ def normalize_header(h):
 
 def map_header(h):
     n = normalize_header(h)
-    return HEADER_MAP.get(n, n.replace(" ", "_"))
+    return HEADER_MAP.get(n) or SCHEMA_KEYS.get(n) or n.replace(" ", "_")
 
 
-def make_doc_id(index, row):
-    """Generate a stable document ID from row data."""
+def doc_id_parts(row):
     parts = []
     for key in ["email", "cfcId", "firstName", "lastName"]:
         val = row.get(key, "")
         if val:
             parts.append(val.strip().lower().replace(" ", "-").replace("@", "-at-")[:20])
+    return parts
+
+
+def make_doc_id(index, row):
+    """Generate a stable document ID from row data (or reuse a dead-letter row's #docId)."""
+    if row.get(DOC_ID_KEY):
+        return row[DOC_ID_KEY]
+    parts = doc_id_parts(row)
     if parts:
-        return "-".join(parts)[:60]
+        return "-".join(parts)[:DOC_ID_MAX]
     return f"registrant-{index}"
 
 
-def read_csv(path):
-    """Read CSV and return list of dicts with mapped keys."""
-    rows = []
+def retryable_errors():
+    """Errors worth retrying with backoff in --async mode."""
+    from google.api_core import exceptions as google_exceptions
+
+    return (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.Aborted,
+    )
+
+
+def iter_csv_records(path):
+    """Yield the header row, then each data row, of a CSV file as lists of strings."""
     with open(path, newline="", encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f)
-        for raw in reader:
-            mapped = {}
-            for header, value in raw.items():
-                if not header or not value or not value.strip():
-                    continue
-                key = map_header(header)
-                mapped[key] = value.strip()
-            if mapped:
-                rows.append(mapped)
+        yield from csv.reader(f)
+
+
+def cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_xlsx_records(path):
+    """Yield the header row, then each data row, of the first sheet of an XLSX file."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        sys.exit("Reading .xlsx needs openpyxl: pip install -r tools/requirements.txt")
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for values in wb.worksheets[0].iter_rows(values_only=True):
+            yield [cell_text(v) for v in values]
+    finally:
+        wb.close()
+
+
+def iter_records(path):
+    """Raw rows (header first) of a CSV or XLSX file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xlsx":
+        return iter_xlsx_records(path)
+    if ext == ".xls":
+        sys.exit("Error: .xls is not supported; export the sheet to CSV or XLSX.")
+    return iter_csv_records(path)
+
+
+def iter_rows(path):
+    """Stream mapped rows (dicts keyed by schema key) from a CSV or XLSX file.
+
+    Headers are mapped once per file; empty cells and rows, and columns whose
+    header starts with "#" (other than #docId), are dropped.
+    """
+    records = iter_records(path)
+    headers = next(records, None)
+    if not headers:
+        return
+    with phase_metrics.phase("header mapping"):
+        columns = [(j, DOC_ID_KEY if h.strip() == DOC_ID_KEY else map_header(h)) for j, h in enumerate(headers)
+                   if h and h.strip() and (not h.strip().startswith("#") or h.strip() == DOC_ID_KEY)]
+    for values in records:
+        mapped = {}
+        for j, key in columns:
+            if j < len(values):
+                value = values[j].strip()
+                if value:
+                    mapped[key] = value
+        if mapped:
+            yield mapped
+
+
+def read_csv(path):
+    """Read CSV (or XLSX) and return list of dicts with mapped keys."""
+    return list(iter_rows(path))
+
+
+def split_row(row):
+    """Split a mapped row into (profile, answers)."""
+    profile = {}
+    answers = {}
+    for key, value in row.items():
+        if key == DOC_ID_KEY:
+            continue
+        if key in PROFILE_KEYS:
+            profile[key] = value
+        else:
+            answers[key] = value
+    return profile, answers
+
+
+def build_doc(row, now):
+    """Build the registrant document written to Firestore."""
+    profile, answers = split_row(row)
+    return {
+        "profile": profile,
+        "answers": answers,
+        "source": "import",
+        "registrationStatus": "registered",
+        "registeredAt": now,
+        "createdAt": now,
+        "updatedAt": now,
+        "eventAttendance": {"checkedIn": False},
+        "flags": {"isWalkIn": False, "hasValidationWarnings": False},
+    }
+
+
+def merge_option(doc_data, replace=False):
+    """The `merge` argument for writing doc_data.
+
+    Normally True. With `replace` (--reconcile) it lists the field paths
+    merge=True would write, but with profile and answers as whole maps, so
+    keys removed from the file are removed from the document too.
+    """
+    if not replace:
+        return True
+    paths = []
+    for key, value in doc_data.items():
+        if isinstance(value, dict) and key not in ("profile", "answers"):
+            paths.extend(f"{key}.{sub}" for sub in value)
+        else:
+            paths.append(key)
+    return paths
+
+
+def hash_value(value, salt=""):
+    """Hash one PII value the way the Dart seeder does: SHA256 of the trimmed,
+    lowercased value, first 16 hex chars. With a salt it is HMAC-SHA256 keyed by
+    the salt instead, so values cannot be looked up in a precomputed table.
+    """
+    text = value.strip().lower().encode("utf-8")
+    if salt:
+        return hmac.new(salt.encode("utf-8"), text, hashlib.sha256).hexdigest()[:HASH_LENGTH]
+    return hashlib.sha256(text).hexdigest()[:HASH_LENGTH]
+
+
+def hash_values(values, salt=""):
+    return [hash_value(v, salt) for v in values]
+
+
+def hash_rows(rows, salt="", workers=1, batch_size=5000):
+    """Yield rows with their PII_KEYS values hashed.
+
+    Rows are taken in batches; values already hashed (repeated family names,
+    emails of people registered twice) come from a memo, and the rest are
+    hashed in one pass per batch, split across `workers` processes when there
+    are enough of them to be worth shipping (workers=0: one per CPU).
+    """
+    memo = {}
+    pool = ProcessPoolExecutor(max_workers=workers or None) if workers != 1 else None
+    try:
+        for batch in chunked(rows, batch_size):
+            new = list({row[k] for row in batch for k in PII_KEYS if k in row and row[k] not in memo})
+            if pool and len(new) > HASH_CHUNK:
+                parts = list(chunked(new, HASH_CHUNK))
+                for part, hashed in zip(parts, pool.map(hash_values, parts, itertools.repeat(salt))):
+                    memo.update(zip(part, hashed))
+            else:
+                memo.update(zip(new, hash_values(new, salt)))
+            for row in batch:
+                for k in PII_KEYS:
+                    if k in row:
+                        row[k] = memo[row[k]]
+                yield row
+            if len(memo) > HASH_MEMO_MAX:
+                memo.clear()
+    finally:
+        if pool:
+            pool.shutdown()
+
+
+def load_rows(path, args):
+    """iter_rows(), with PII hashed when --hash-pii is set."""
+    rows = iter_rows(path)
+    if args.hash_pii:
+        rows = hash_rows(rows, args.hash_salt, args.hash_workers)
     return rows
 
 
-def seed(db, rows):
-    """Write rows to Firestore."""
-    collection = db.collection(f"events/{EVENT_ID}/registrants")
+def unmapped_headers(path):
+    """Headers with no HEADER_MAP entry (stored as answers under a derived key)."""
+    headers = next(iter_records(path), None) or []
+    return [h.strip() for h in headers
+            if h and h.strip() and not h.strip().startswith("#")
+            and normalize_header(h) not in HEADER_MAP and normalize_header(h) not in SCHEMA_KEYS]
+
+
+def validate_row(row, hashed=False):
+    """Return the list of problems with one mapped row (empty if it is fine).
+
+    With `hashed` (--hash-pii) email and phone are already hashes, so their
+    format is not checked.
+    """
+    problems = [f"missing {key}" for key in REQUIRED_KEYS if not row.get(key)]
+    email = None if hashed else row.get("email")
+    if email and not EMAIL_RE.fullmatch(email):
+        problems.append("invalid email")
+    phone = None if hashed else row.get("phone")
+    if phone and not (PHONE_RE.fullmatch(phone) and 7 <= sum(c.isdigit() for c in phone) <= 15):
+        problems.append("invalid phone")
+    kids = row.get("kidsCount")
+    if kids and not kids.isdigit():
+        problems.append("non-numeric kidsCount")
+    return problems
+
+
+def validate_chunk(chunk, hashed=False):
+    """Validate (index, row) pairs. Returns ({problem: [index]}, [(doc_id, index, truncated)])."""
+    issues = {}
+    ids = []
+    for i, row in chunk:
+        for problem in validate_row(row, hashed):
+            issues.setdefault(problem, []).append(i)
+        full = "-".join(doc_id_parts(row))
+        ids.append((make_doc_id(i, row), i, len(full) > DOC_ID_MAX))
+    return issues, ids
+
+
+def validate_rows(rows, indices=None, workers=0, chunk_size=2000, hashed=False):
+    """Validate rows across a process pool (workers=0: one per CPU).
+
+    Returns (row count, {problem: [index]}, {doc_id: [(index, truncated)]})
+    where the last dict only holds doc IDs shared by more than one row.
+    """
+    pairs = zip(itertools.count() if indices is None else indices, rows)
+    chunks = chunked(pairs, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        return 0, {}, {}
+    second = next(chunks, None)
+    chunks = itertools.chain([first], [second] if second else [], chunks)
+    if second is None or workers == 1:
+        results = map(validate_chunk, chunks, itertools.repeat(hashed))
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            results = list(pool.map(validate_chunk, chunks, itertools.repeat(hashed)))
+
+    count = 0
+    issues = {}
+    by_id = {}
+    for chunk_issues, ids in results:
+        count += len(ids)
+        for problem, found in chunk_issues.items():
+            issues.setdefault(problem, []).extend(found)
+        for doc_id, i, truncated in ids:
+            by_id.setdefault(doc_id, []).append((i, truncated))
+    collisions = {doc_id: hits for doc_id, hits in by_id.items() if len(hits) > 1}
+    return count, issues, collisions
+
+
+def print_validation_report(count, issues, collisions, unmapped):
+    """Print the --dry-run summary; row numbers are index + 2, as in the dead-letter #row column."""
+    print(f"Validated {count} rows")
+    if not issues and not collisions and not unmapped:
+        print("  No problems found.")
+    for problem, found in sorted(issues.items()):
+        print(f"  {problem}: {len(found)} rows, e.g. rows {[i + 2 for i in found[:5]]}")
+    if collisions:
+        rows = sum(len(hits) for hits in collisions.values())
+        truncated = sum(1 for hits in collisions.values() if any(t for _, t in hits))
+        print(f"  doc ID collisions: {len(collisions)} IDs shared by {rows} rows "
+              f"({truncated} only after truncation to {DOC_ID_MAX} chars); later rows overwrite earlier ones")
+        for doc_id, hits in list(collisions.items())[:5]:
+            print(f"    {doc_id}: rows {[i + 2 for i, _ in hits]}")
+    if unmapped:
+        print(f"  unmapped headers (stored as answers): {unmapped}")
+
+
+def seed(db, rows, indices=None, failed=None, event_id=EVENT_ID, replace=False):
+    """Write rows (a list or any iterable) to Firestore.
+
+    `indices` gives each row's position in the source file (for doc IDs and
+    error row numbers) when `rows` is a subset; failing indices are appended
+    to `failed` if given. `replace` works as in merge_option().
+    """
+    collection = db.collection(f"events/{event_id}/registrants")
     now = datetime.now(timezone.utc)
+    indices = itertools.count() if indices is None else indices
+    total = f"/{len(rows)}" if hasattr(rows, "__len__") else ""
     imported = 0
     skipped = 0
 
-    for i, row in enumerate(rows):
-        profile = {}
-        answers = {}
-        for key, value in row.items():
-            if key in PROFILE_KEYS:
-                profile[key] = value
-            else:
-                answers[key] = value
-
+    for n, (i, row) in enumerate(zip(indices, rows)):
         doc_id = make_doc_id(i, row)
-        doc_data = {
-            "profile": profile,
-            "answers": answers,
-            "source": "import",
-            "registrationStatus": "registered",
-            "registeredAt": now,
-            "createdAt": now,
-            "updatedAt": now,
-            "eventAttendance": {"checkedIn": False},
-            "flags": {"isWalkIn": False, "hasValidationWarnings": False},
-        }
+        doc_data = build_doc(row, now)
 
         try:
-            collection.document(doc_id).set(doc_data, merge=True)
+            start = time.perf_counter()
+            collection.document(doc_id).set(doc_data, merge=merge_option(doc_data, replace))
+            phase_metrics.latency("firestore write", time.perf_counter() - start)
             imported += 1
-            if (i + 1) % 50 == 0:
-                print(f"  Progress: {i + 1}/{len(rows)}")
+            if (n + 1) % 50 == 0:
+                print(f"  Progress: {n + 1}{total}")
         except Exception as e:
             skipped += 1
+            if failed is not None:
+                failed.append(i)
             print(f"  Row {i + 2}: {e}")
 
     return imported, skipped
 
 
+def chunked(items, size):
+    """Yield lists of up to `size` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def commit_chunk(db, collection, chunk, replace=False):
+    """Commit one chunk of (key, doc_id, doc_data) as a WriteBatch; doc_data None deletes.
+
+    A batch is all-or-nothing, so when it fails the writes are retried one by
+    one to find the bad ones. Returns (written, [(key, error), ...]).
+    """
+    batch = db.batch()
+    for _, doc_id, doc_data in chunk:
+        if doc_data is None:
+            batch.delete(collection.document(doc_id))
+        else:
+            batch.set(collection.document(doc_id), doc_data, merge=merge_option(doc_data, replace))
+    try:
+        start = time.perf_counter()
+        batch.commit()
+        phase_metrics.latency("firestore batch commit", time.perf_counter() - start)
+        return len(chunk), []
+    except Exception:
+        failures = []
+        for key, doc_id, doc_data in chunk:
+            try:
+                if doc_data is None:
+                    collection.document(doc_id).delete()
+                else:
+                    collection.document(doc_id).set(doc_data, merge=merge_option(doc_data, replace))
+            except Exception as e:
+                failures.append((key, e))
+        return len(chunk) - len(failures), failures
+
+
+def commit_batches(db, collection, entries, batch_size=MAX_BATCH_SIZE, max_in_flight=4,
+                   total="", label=lambda i: f"Row {i + 2}", replace=False):
+    """Commit a stream of (key, doc_id, doc_data) entries, up to `max_in_flight` batches at once.
+
+    Only the batches in flight are held in memory. Returns (written, failed keys).
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    max_in_flight = max(1, max_in_flight)
+    written_total = 0
+    failed = []
+    done = 0
+    pending = {}
+
+    def collect(finished):
+        nonlocal written_total, done
+        for future in finished:
+            batch_no, size = pending.pop(future)
+            written, failures = future.result()
+            written_total += written
+            done += size
+            for key, e in failures:
+                failed.append(key)
+                print(f"  {label(key)}: {e}")
+            print(f"  Batch {batch_no}: {written}/{size} written ({done}{total})")
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for batch_no, chunk in enumerate(chunked(entries, batch_size), start=1):
+            if len(pending) >= max_in_flight:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            future = pool.submit(commit_chunk, db, collection, chunk, replace)
+            pending[future] = (batch_no, len(chunk))
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+
+    return written_total, failed
+
+
+def seed_bulk(db, rows, batch_size=MAX_BATCH_SIZE, max_in_flight=4, indices=None, failed=None,
+              event_id=EVENT_ID, replace=False):
+    """Write rows to Firestore in WriteBatch commits, up to `max_in_flight` at once.
+
+    Rows may be a stream; only the batches in flight are held in memory.
+    `indices`, `failed` and `replace` work as in seed().
+    """
+    collection = db.collection(f"events/{event_id}/registrants")
+    now = datetime.now(timezone.utc)
+    indices = itertools.count() if indices is None else indices
+    total = f"/{len(rows)}" if hasattr(rows, "__len__") else ""
+    entries = ((i, make_doc_id(i, row), build_doc(row, now)) for i, row in zip(indices, rows))
+    imported, failures = commit_batches(db, collection, entries, batch_size, max_in_flight, total, replace=replace)
+    if failed is not None:
+        failed.extend(failures)
+    return imported, len(failures)
+
+
+def delete_bulk(db, doc_ids, batch_size=MAX_BATCH_SIZE, max_in_flight=4, event_id=EVENT_ID):
+    """Delete registrant documents in WriteBatch commits. Returns (deleted, failed doc IDs)."""
+    collection = db.collection(f"events/{event_id}/registrants")
+    entries = ((doc_id, doc_id, None) for doc_id in doc_ids)
+    return commit_batches(db, collection, entries, batch_size, max_in_flight,
+                          f"/{len(doc_ids)}", label=lambda doc_id: f"Delete {doc_id}")
+
+
+def paginate(query, page_size=1000):
+    """Run an ordered query page by page.
+
+    Each page is a separate query resumed after the last document, so a long
+    read never depends on one long-lived stream.
+    """
+    query = query.limit(page_size)
+    last = None
+    while True:
+        page = list((query.start_after(last) if last else query).stream())
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+
+def iter_documents(collection, field_paths=None, page_size=1000):
+    """Stream a collection page by page, ordered by document ID."""
+    from firebase_admin import firestore
+
+    query = collection.order_by(firestore.FieldPath.document_id())
+    if field_paths is not None:
+        query = query.select(field_paths)
+    return paginate(query, page_size)
+
+
+def fetch_existing(db, page_size=1000, event_id=EVENT_ID):
+    """Hash the profile/answers of every registrant already in Firestore.
+
+    Returns ({doc_id: hash}, set of doc IDs created by an import). Walk-ins and
+    other non-import registrants are hashed but never treated as orphans.
+    """
+    collection = db.collection(f"events/{event_id}/registrants")
+    existing = {}
+    imported_ids = set()
+    for snap in iter_documents(collection, ["profile", "answers", "source"], page_size):
+        data = snap.to_dict() or {}
+        existing[snap.id] = content_hash(data.get("profile") or {}, data.get("answers") or {})
+        if data.get("source") == "import":
+            imported_ids.add(snap.id)
+    return existing, imported_ids
+
+
+class TokenBucket:
+    """Async token bucket: allows `rate` acquisitions per second, bursting up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def write_dead_letter(path, failures):
+    """Write failed (index, row, error) entries to a CSV that iter_rows() can read back."""
+    keys = []
+    for _, row, _ in failures:
+        keys.extend(k for k in row if k not in keys and k != DOC_ID_KEY)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(DEAD_LETTER_INFO + keys)
+        for i, row, e in failures:
+            w.writerow([i + 2, f"{type(e).__name__}: {e}", make_doc_id(i, row)] + [row.get(k, "") for k in keys])
+
+
+async def seed_async(db, rows, concurrency=32, rate=None, retries=5, indices=None, failed=None,
+                     dead_letter_path=None, event_id=EVENT_ID, replace=False):
+    """Write rows with an async Firestore client.
+
+    At most `concurrency` writes are in flight and, if `rate` is set, at most
+    `rate` writes start per second. Quota and timeout errors are retried with
+    exponential backoff up to `retries` times; rows that still fail are
+    written to `dead_letter_path`. `indices`, `failed` and `replace` work as in seed().
+    """
+    collection = db.collection(f"events/{event_id}/registrants")
+    now = datetime.now(timezone.utc)
+    indices = itertools.count() if indices is None else indices
+    retryable = retryable_errors()
+    bucket = TokenBucket(rate) if rate else None
+    slots = asyncio.Semaphore(max(1, concurrency))
+    tasks = set()
+    failures = []
+    imported = 0
+
+    async def write_one(i, row):
+        nonlocal imported
+        doc_ref = collection.document(make_doc_id(i, row))
+        doc_data = build_doc(row, now)
+        try:
+            for attempt in range(retries + 1):
+                if bucket:
+                    await bucket.acquire()
+                try:
+                    start = time.perf_counter()
+                    await doc_ref.set(doc_data, merge=merge_option(doc_data, replace))
+                    phase_metrics.latency("firestore write", time.perf_counter() - start)
+                    break
+                except retryable:
+                    if attempt == retries:
+                        raise
+                    # Full jitter keeps retries from many rows from landing together.
+                    await asyncio.sleep(random.uniform(0, min(30.0, 0.5 * 2 ** attempt)))
+            imported += 1
+            if imported % 500 == 0:
+                print(f"  Progress: {imported} written")
+        except Exception as e:
+            failures.append((i, row, e))
+            if failed is not None:
+                failed.append(i)
+            print(f"  Row {i + 2}: {e}")
+        finally:
+            slots.release()
+
+    for i, row in zip(indices, rows):
+        await slots.acquire()
+        task = asyncio.create_task(write_one(i, row))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    if failures and dead_letter_path:
+        failures.sort(key=lambda f: f[0])
+        write_dead_letter(dead_letter_path, failures)
+        print(f"  {len(failures)} failed row(s) written to {dead_letter_path}")
+    return imported, len(failures)
+
+
+def content_hash(profile, answers):
+    """Hash of a registrant's profile/answers, independent of key order."""
+    payload = json.dumps({"profile": profile, "answers": answers}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def row_hash(row):
+    return content_hash(*split_row(row))
+
+
+def default_manifest_path(csv_path, database):
+    db_slug = database.strip("()") or "default"
+    return f"{csv_path}.{db_slug}.manifest.json"
+
+
+def load_manifest(path, database, event_id=EVENT_ID):
+    """Return {doc_id: hash} from a previous run against the same target, else {}."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("eventId") != event_id or data.get("database") != database:
+        print(f"Manifest {path} is for {data.get('database')}/{data.get('eventId')}; ignoring it.")
+        return {}
+    return data.get("docs", {})
+
+
+def save_manifest(path, database, docs, event_id=EVENT_ID):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"eventId": event_id, "database": database, "docs": docs}, f, indent=0, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def diff_manifest(rows, manifest):
+    """Compare rows (a list or stream) with a manifest.
+
+    Returns (indices to write, rows to write, {doc_id: hash} for every row,
+    counts) where counts has new/changed/unchanged totals. Only the rows to
+    write are kept in memory.
+    """
+    to_write = []
+    write_rows = []
+    hashes = {}
+    counts = {"new": 0, "changed": 0, "unchanged": 0}
+    for i, row in enumerate(rows):
+        doc_id = make_doc_id(i, row)
+        h = row_hash(row)
+        previous = manifest.get(doc_id)
+        # Rows whose doc IDs collide must all be written if any of them differs,
+        # otherwise the earlier row would win on the next run.
+        if previous == h and hashes.get(doc_id, h) == h:
+            counts["unchanged"] += 1
+        else:
+            counts["new" if previous is None else "changed"] += 1
+            to_write.append(i)
+            write_rows.append(row)
+        hashes[doc_id] = h
+    return to_write, write_rows, hashes, counts
+
+
+def init_app(args):
+    """Initialize Firebase Admin from --key, GOOGLE_APPLICATION_CREDENTIALS or ADC."""
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if args.key:
+        cred = credentials.Certificate(args.key)
+    elif os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
+        cred = credentials.ApplicationDefault()
+    else:
+        # Try Application Default Credentials (gcloud auth application-default login)
+        cred = credentials.ApplicationDefault()
+
+    firebase_admin.initialize_app(cred, {"projectId": args.project})
+
+
+def load_event_jobs(path, default_database):
+    """Read an --events file into a list of {eventId, file, database} jobs."""
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for n, entry in enumerate(entries, start=1):
+        if not entry.get("eventId") or not entry.get("file"):
+            sys.exit(f"Error: {path} entry {n} needs eventId and file")
+        file_path = os.path.join(base_dir, entry["file"])
+        if not os.path.exists(file_path):
+            sys.exit(f"Error: File not found: {file_path}")
+        jobs.append({
+            "eventId": entry["eventId"],
+            "file": file_path,
+            "database": entry.get("database") or default_database,
+        })
+    return jobs
+
+
+def run_events(args):
+    """Seed every job in --events concurrently, sharing one client per database."""
+    jobs = load_event_jobs(args.events, args.database)
+    print(f"Seeding {len(jobs)} event file(s) from {args.events}")
+    for job in jobs:
+        print(f"  events/{job['eventId']}/registrants <- {job['file']} ({job['database']})")
+    if args.dry_run:
+        for job in jobs:
+            print(f"{job['file']} -> events/{job['eventId']}/registrants")
+            count, issues, collisions = validate_rows(load_rows(job["file"], args), workers=args.workers,
+                                                      hashed=args.hash_pii)
+            print_validation_report(count, issues, collisions, unmapped_headers(job["file"]))
+            print(f"Dry run: would import {count} registrants to events/{job['eventId']}/registrants")
+        return
+
+    init_app(args)
+    from firebase_admin import firestore, firestore_async
+
+    if args.use_async:
+        async def run_all():
+            clients = {}
+            for job in jobs:
+                if job["database"] not in clients:
+                    clients[job["database"]] = firestore_async.client(database_id=job["database"])
+
+            async def run_job(job):
+                start = time.perf_counter()
+                imported, skipped = await seed_async(
+                    clients[job["database"]], load_rows(job["file"], args), args.concurrency, args.rate,
+                    args.retries, dead_letter_path=f"{os.path.splitext(job['file'])[0]}.{job['eventId']}.dead-letter.csv",
+                    event_id=job["eventId"])
+                return dict(job, imported=imported, skipped=skipped, seconds=time.perf_counter() - start)
+
+            return await asyncio.gather(*(run_job(job) for job in jobs))
+
+        results = asyncio.run(run_all())
+    else:
+        def run_job(job):
+            # firestore.client() caches per database, so jobs on the same database share a channel.
+            db = firestore.client(database_id=job["database"])
+            rows = load_rows(job["file"], args)
+            start = time.perf_counter()
+            if args.bulk:
+                imported, skipped = seed_bulk(db, rows, args.batch_size, args.max_in_flight,
+                                              event_id=job["eventId"])
+            else:
+                imported, skipped = seed(db, rows, event_id=job["eventId"])
+            return dict(job, imported=imported, skipped=skipped, seconds=time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            results = list(pool.map(run_job, jobs))
+
+    print("\nSummary:")
+    for r in results:
+        rate = (r["imported"] + r["skipped"]) / r["seconds"] if r["seconds"] else 0
+        print(f"  {r['eventId']:<24} imported {r['imported']:>6}  skipped {r['skipped']:>4}  "
+              f"{r['seconds']:7.1f}s  {rate:8.1f} rows/s  ({os.path.basename(r['file'])})")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Seed NLC registrants to Firestore")
     parser.add_argument("csv_file", nargs="?", default="tools/nlc_registrants.csv",
-                        help="Path to CSV file (default: tools/nlc_registrants.csv)")
+                        help="Path to CSV or XLSX file (default: tools/nlc_registrants.csv)")
     parser.add_argument("--database", default="event-hub-dev",
                         help="Firestore database ID (default: event-hub-dev)")
+    parser.add_argument("--event", default=EVENT_ID,
+                        help=f"Event ID to seed (default: {EVENT_ID})")
+    parser.add_argument("--events", default=None,
+                        help="JSON list of {eventId, file, database} jobs to seed concurrently in one process")
     parser.add_argument("--key", default=None,
                         help="Path to Firebase service account key JSON")
     parser.add_argument("--project", default="aisaiah-event-hub",
                         help="Firebase project ID")
     parser.add_argument("--dry-run", action="store_true",
-                        help="Parse CSV and print stats without writing")
+                        help="Validate the file and print a summary without writing (no Firebase needed)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Validation processes for --dry-run (default: 0 = one per CPU)")
+    parser.add_argument("--hash-pii", action="store_true",
+                        help=f"Hash {', '.join(PII_KEYS)} before writing, like the Dart seeder "
+                             "(search by name/email then no longer works)")
+    parser.add_argument("--hash-salt", default=os.environ.get("SEED_HASH_SALT", ""),
+                        help="Salt for --hash-pii (default: $SEED_HASH_SALT; empty = same hashes as the Dart seeder)")
+    parser.add_argument("--hash-workers", type=int, default=1,
+                        help="Processes for --hash-pii (default: 1 = inline; 0 = one per CPU)")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Write in batched commits instead of one request per row")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE,
+                        help=f"Writes per batch commit with --bulk (max {MAX_BATCH_SIZE})")
+    parser.add_argument("--max-in-flight", type=int, default=4,
+                        help="Batch commits in flight at once with --bulk (default: 4)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only write rows that are new or changed since the last run (see --manifest)")
+    parser.add_argument("--manifest", default=None,
+                        help="Manifest file for --incremental (default: <csv_file>.<database>.manifest.json)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Write with the async client, with rate limiting and retries")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Writes in flight at once with --async (default: 32)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Max writes per second with --async (default: unlimited)")
+    parser.add_argument("--retries", type=int, default=5,
+                        help="Retries for quota/timeout errors with --async (default: 5)")
+    parser.add_argument("--dead-letter", default=None,
+                        help="CSV for rows that still fail with --async (default: <file name>.dead-letter.csv)")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="Diff the file against Firestore first and write only inserts/updates in bulk; "
+                             "updates replace profile/answers, so columns removed from the file are removed")
+    parser.add_argument("--prune", action="store_true",
+                        help="With --reconcile, delete imported registrants that are no longer in the file")
+    parser.add_argument("--page-size", type=int, default=1000,
+                        help="Documents per page when reading Firestore with --reconcile (default: 1000)")
+    phase_metrics.add_profile_args(parser)
     args = parser.parse_args()
+    phase_metrics.enable_from_args(args, "seed_registrants")
+    if args.reconcile and args.incremental:
+        parser.error("--reconcile and --incremental are mutually exclusive")
+    if args.prune and not args.reconcile:
+        parser.error("--prune requires --reconcile")
+    if args.events:
+        if args.reconcile or args.incremental:
+            parser.error("--events does not support --reconcile or --incremental")
+        with phase_metrics.phase("events"):
+            run_events(args)
+        return
 
-    # Read CSV
     if not os.path.exists(args.csv_file):
         print(f"Error: File not found: {args.csv_file}")
         sys.exit(1)
+    if args.reconcile or not args.dry_run:
+        # Imported here so --dry-run starts without loading the Firebase SDK.
+        from firebase_admin import firestore, firestore_async
 
-    rows = read_csv(args.csv_file)
-    print(f"Read {len(rows)} registrants from {args.csv_file}")
+    manifest_path = args.manifest or default_manifest_path(args.csv_file, args.database)
+    rows = phase_metrics.timed_iter("parse", iter_rows(args.csv_file))
+    if args.hash_pii:
+        # Hashed before diffing, so manifests and --reconcile compare what is stored.
+        rows = phase_metrics.timed_iter("hash", hash_rows(rows, args.hash_salt, args.hash_workers))
+    indices = None
+    if args.incremental:
+        manifest = load_manifest(manifest_path, args.database, args.event)
+        with phase_metrics.phase("diff"):
+            indices, rows, hashes, counts = diff_manifest(rows, manifest)
+        print(f"Read {sum(counts.values())} registrants from {args.csv_file}")
+        print(f"Incremental: {counts['new']} new, {counts['changed']} changed, "
+              f"{counts['unchanged']} unchanged (manifest: {manifest_path})")
 
-    if not rows:
-        print("No data rows found.")
-        sys.exit(0)
+    orphans = []
+    if args.reconcile:
+        init_app(args)
+        db = firestore.client(database_id=args.database)
+        print(f"Fetching existing registrants from events/{args.event}/registrants...")
+        with phase_metrics.phase("firestore read"):
+            existing, imported_ids = fetch_existing(db, args.page_size, args.event)
+        with phase_metrics.phase("diff"):
+            indices, rows, hashes, counts = diff_manifest(rows, existing)
+        orphans = sorted(imported_ids - hashes.keys())
+        print(f"Read {sum(counts.values())} registrants from {args.csv_file}")
+        print(f"Reconcile: {counts['new']} insert, {counts['changed']} update, "
+              f"{counts['unchanged']} unchanged, {len(orphans)} orphaned")
 
     if args.dry_run:
-        print(f"Dry run: would import {len(rows)} registrants to events/{EVENT_ID}/registrants")
-        for i, row in enumerate(rows[:3]):
-            print(f"  Sample {i + 1}: {row}")
+        with phase_metrics.phase("validate"):
+            to_import, issues, collisions = validate_rows(rows, indices, args.workers, hashed=args.hash_pii)
+        phase_metrics.add_rows("validate", to_import)
+        print_validation_report(to_import, issues, collisions, unmapped_headers(args.csv_file))
+        print(f"Dry run: would import {to_import} registrants to events/{args.event}/registrants")
+        if orphans:
+            print(f"Dry run: would delete {len(orphans)} orphaned registrants with --prune, e.g. {orphans[:3]}")
         sys.exit(0)
 
-    # Initialize Firebase Admin
-    if args.key:
-        cred = credentials.Certificate(args.key)
-    elif os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
-        cred = credentials.ApplicationDefault()
-    else:
-        # Try Application Default Credentials (gcloud auth application-default login)
-        cred = credentials.ApplicationDefault()
-
-    firebase_admin.initialize_app(cred, {"projectId": args.project})
+    if indices is not None and not indices and not (args.prune and orphans):
+        print("Nothing changed since the last run." if args.incremental else "Firestore is already in sync.")
+        if orphans:
+            print(f"{len(orphans)} orphaned registrants left in place; use --prune to delete them.")
+        sys.exit(0)
 
-    # Get Firestore client for the specified database
-    db = firestore.client(database_id=args.database)
+    if not args.reconcile:
+        init_app(args)
 
     print(f"Target: project={args.project}, database={args.database}")
-    print(f"Collection: events/{EVENT_ID}/registrants")
-    print(f"Writing {len(rows)} registrants...")
+    print(f"Collection: events/{args.event}/registrants")
+    if indices is None:
+        # Rows stream from the file straight into writes.
+        print(f"Writing registrants from {args.csv_file}...")
+    else:
+        print(f"Writing {len(rows)} registrants...")
+
+    failed = []
+    # When rows stream from the file this includes parsing; the parse phase shows that share.
+    with phase_metrics.phase("firestore write"):
+        if args.use_async:
+            dead_letter_path = args.dead_letter or f"{os.path.splitext(args.csv_file)[0]}.dead-letter.csv"
 
-    imported, skipped = seed(db, rows)
+            async def run():
+                # The async client must be created inside the event loop it runs on.
+                db = firestore_async.client(database_id=args.database)
+                return await seed_async(db, rows, args.concurrency, args.rate, args.retries,
+                                        indices=indices, failed=failed, dead_letter_path=dead_letter_path,
+                                        event_id=args.event, replace=args.reconcile)
+
+            imported, skipped = asyncio.run(run())
+        else:
+            # Get Firestore client for the specified database
+            db = firestore.client(database_id=args.database)
+            if args.bulk or args.reconcile:
+                imported, skipped = seed_bulk(db, rows, args.batch_size, args.max_in_flight,
+                                              indices=indices, failed=failed, event_id=args.event,
+                                              replace=args.reconcile)
+            else:
+                imported, skipped = seed(db, rows, indices=indices, failed=failed, event_id=args.event)
+    phase_metrics.add_rows("firestore write", imported)
+    if imported + skipped == 0 and not orphans:
+        print("No data rows found.")
+        sys.exit(0)
     print(f"\nDone. Imported: {imported}, Skipped: {skipped}")
 
+    if orphans and args.prune:
+        print(f"Deleting {len(orphans)} orphaned registrants...")
+        with phase_metrics.phase("firestore delete", len(orphans)):
+            deleted, failed_deletes = delete_bulk(db, orphans, args.batch_size, args.max_in_flight,
+                                                  event_id=args.event)
+        print(f"Deleted: {deleted}, Failed: {len(failed_deletes)}")
+    elif orphans:
+        print(f"{len(orphans)} orphaned registrants left in place; use --prune to delete them.")
+
+    if args.incremental:
+        # Failed rows keep their previous hash (or none) so the next run retries them.
+        written = dict(zip(indices, rows))
+        for i in failed:
+            doc_id = make_doc_id(i, written[i])
+            if doc_id in manifest:
+                hashes[doc_id] = manifest[doc_id]
+            else:
+                hashes.pop(doc_id, None)
+        save_manifest(manifest_path, args.database, hashes, args.event)
+        print(f"Manifest updated: {manifest_path}")
+
 
 if __name__ == "__main__":
     main()
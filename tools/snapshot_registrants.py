@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Snapshot registrants from Firestore into a local SQLite file.
+
+Usage:
+  pip install -r tools/requirements.txt
+  python tools/snapshot_registrants.py                              # nlc-2026 -> tools/registrants.sqlite
+  python tools/snapshot_registrants.py --event nlc-2026 --event march-assembly-2026
+  python tools/snapshot_registrants.py --full                       # re-read everything, drop deleted docs
+  python tools/snapshot_registrants.py --page-size 200 --out /tmp/nlc.sqlite
+
+The first run for an event reads the whole collection. Later runs only fetch
+documents with updatedAt at or after the newest one already stored (a seed run
+stamps all its documents with one time, so a snapshot taken mid-seed must see
+that time again; re-read documents are just upserted). Use --full to pick up
+deletions and documents without updatedAt.
+
+Every page is committed on its own with the event's next sync_seq, so a reader
+(registrant_report.py) can pick up exactly the pages committed since it last
+looked, even while a sync is still running.
+
+Query the snapshot with any SQLite client, e.g.:
+  sqlite3 tools/registrants.sqlite "select doc_id, first_name, last_name from registrants where email = 'x@y.com'"
+
+Requires: Firebase credentials, same options as seed_registrants.py.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from firebase_admin import firestore
+
+from seed_registrants import EVENT_ID, init_app, iter_documents, paginate
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrants (
+    event_id   TEXT NOT NULL,
+    doc_id     TEXT NOT NULL,
+    email      TEXT,
+    first_name TEXT,
+    last_name  TEXT,
+    cfc_id     TEXT,
+    updated_at TEXT,
+    synced_at  TEXT NOT NULL,
+    data       TEXT NOT NULL,
+    sync_seq   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, doc_id)
+);
+CREATE INDEX IF NOT EXISTS idx_registrants_email ON registrants (event_id, email);
+CREATE INDEX IF NOT EXISTS idx_registrants_last_name ON registrants (event_id, last_name);
+CREATE INDEX IF NOT EXISTS idx_registrants_cfc_id ON registrants (event_id, cfc_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    event_id  TEXT PRIMARY KEY,
+    last_sync TEXT,
+    synced_at TEXT NOT NULL,
+    sync_seq  INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+UPSERT = """
+INSERT INTO registrants (event_id, doc_id, email, first_name, last_name, cfc_id, updated_at, synced_at, data,
+                         sync_seq)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (event_id, doc_id) DO UPDATE SET
+    email = excluded.email, first_name = excluded.first_name, last_name = excluded.last_name,
+    cfc_id = excluded.cfc_id, updated_at = excluded.updated_at, synced_at = excluded.synced_at,
+    data = excluded.data, sync_seq = excluded.sync_seq
+"""
+
+
+def normalize(value):
+    if not value or not isinstance(value, str):
+        return None
+    return value.strip().lower() or None
+
+
+def to_record(event_id, doc_id, data, synced_at):
+    """Flatten a registrant document into a registrants table row."""
+    profile = data.get("profile") or {}
+    updated_at = data.get("updatedAt")
+    return (
+        event_id,
+        doc_id,
+        normalize(profile.get("email")),
+        normalize(profile.get("firstName")),
+        normalize(profile.get("lastName")),
+        normalize(profile.get("cfcId")),
+        updated_at.isoformat() if isinstance(updated_at, datetime) else None,
+        synced_at,
+        json.dumps(data, default=str, sort_keys=True),
+    )
+
+
+def open_snapshot(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    # Snapshots written before sync_seq existed: add the column (0 = before any numbered page).
+    for table in ("registrants", "sync_state"):
+        if "sync_seq" not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN sync_seq INTEGER NOT NULL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_registrants_sync_seq ON registrants (event_id, sync_seq)")
+    conn.commit()
+    return conn
+
+
+def last_sync(conn, event_id):
+    row = conn.execute("SELECT last_sync FROM sync_state WHERE event_id = ?", (event_id,)).fetchone()
+    return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+
+def next_sync_seq(conn, event_id):
+    """Sequence number for the event's next page commit. Kept in sync_state, so it never goes back
+    even when --full removes the documents that carried the highest one."""
+    row = conn.execute("SELECT sync_seq FROM sync_state WHERE event_id = ?", (event_id,)).fetchone()
+    return (row[0] if row else 0) + 1
+
+
+def save_sync_state(conn, event_id, newest, synced_at, sync_seq):
+    conn.execute(
+        "INSERT INTO sync_state (event_id, last_sync, synced_at, sync_seq) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (event_id) DO UPDATE SET "
+        "last_sync = COALESCE(excluded.last_sync, sync_state.last_sync), synced_at = excluded.synced_at, "
+        "sync_seq = excluded.sync_seq",
+        (event_id, newest.isoformat() if newest else None, synced_at, sync_seq),
+    )
+
+
+def snapshot_event(db, conn, event_id, page_size=500, full=False):
+    """Copy one event's registrants into the snapshot. Returns (documents read, documents removed)."""
+    collection = db.collection(f"events/{event_id}/registrants")
+    synced_at = datetime.now(timezone.utc).isoformat()
+    since = None if full else last_sync(conn, event_id)
+    if since is None:
+        docs = iter_documents(collection, page_size=page_size)
+    else:
+        # >=: documents sharing the newest stored updatedAt may not all have been read yet; the
+        # upsert dedupes by doc ID. Ordering by updatedAt keeps each page's cursor valid.
+        query = (collection.where(filter=firestore.FieldFilter("updatedAt", ">=", since))
+                 .order_by("updatedAt")
+                 .order_by(firestore.FieldPath.document_id()))
+        docs = paginate(query, page_size)
+
+    read = 0
+    newest = since
+    page = []
+
+    def flush():
+        # One transaction per page: an interrupted run keeps what it already copied, and readers
+        # see the page as one new sync_seq.
+        with conn:
+            seq = next_sync_seq(conn, event_id)
+            conn.executemany(UPSERT, [record + (seq,) for record in page])
+            save_sync_state(conn, event_id, newest, synced_at, seq)
+        page.clear()
+
+    for snap in docs:
+        data = snap.to_dict() or {}
+        updated_at = data.get("updatedAt")
+        if isinstance(updated_at, datetime) and (newest is None or updated_at > newest):
+            newest = updated_at
+        page.append(to_record(event_id, snap.id, data, synced_at))
+        read += 1
+        if len(page) >= page_size:
+            flush()
+            print(f"  {event_id}: {read} documents")
+    flush()
+
+    removed = 0
+    if since is None:
+        # A full read saw every live document, so anything not touched this run was deleted.
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM registrants WHERE event_id = ? AND synced_at != ?", (event_id, synced_at)
+            ).rowcount
+    return read, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot Firestore registrants into SQLite")
+    parser.add_argument("--event", action="append", default=None,
+                        help=f"Event ID to snapshot; repeat for several (default: {EVENT_ID})")
+    parser.add_argument("--out", default="tools/registrants.sqlite",
+                        help="SQLite file to create or refresh (default: tools/registrants.sqlite)")
+    parser.add_argument("--page-size", type=int, default=500,
+                        help="Documents per Firestore page and SQLite transaction (default: 500)")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-read every document and drop ones deleted from Firestore")
+    parser.add_argument("--database", default="event-hub-dev",
+                        help="Firestore database ID (default: event-hub-dev)")
+    parser.add_argument("--key", default=None,
+                        help="Path to Firebase service account key JSON")
+    parser.add_argument("--project", default="aisaiah-event-hub",
+                        help="Firebase project ID")
+    args = parser.parse_args()
+
+    init_app(args)
+    db = firestore.client(database_id=args.database)
+    conn = open_snapshot(args.out)
+    print(f"Source: project={args.project}, database={args.database}")
+    print(f"Snapshot: {os.path.abspath(args.out)}")
+
+    for event_id in args.event or [EVENT_ID]:
+        since = None if args.full else last_sync(conn, event_id)
+        mode = f"changes since {since.isoformat()}" if since else "full read"
+        print(f"events/{event_id}/registrants ({mode})...")
+        read, removed = snapshot_event(db, conn, event_id, args.page_size, args.full)
+        total = conn.execute("SELECT COUNT(*) FROM registrants WHERE event_id = ?", (event_id,)).fetchone()[0]
+        print(f"  Read {read}, removed {removed}; {total} registrants in snapshot")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()